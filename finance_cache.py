@@ -0,0 +1,56 @@
+import collections
+
+
+class ReportCache:
+    """
+    Least-recently-used cache for report and query results.
+
+    Every entry remembers the data version it was computed at. Bumping the
+    version whenever the ledger changes makes all older entries stale, so a
+    cached result is only ever returned while the data is unchanged.
+    """
+
+    def __init__(self, max_entries=128):
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries (int): Entries kept before the least recently used is evicted
+        """
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()  # key -> (version, result)
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def bump(self):
+        """Record that the data changed, invalidating every cached result."""
+        self.version += 1
+        self.entries.clear()
+
+    def get(self, report, params, compute):
+        """
+        Return a cached result, computing and storing it on a miss.
+
+        Args:
+            report (str): Name of the report or query
+            params (tuple): Parameters that affect the result
+            compute (callable): Produces the result when it is not cached
+
+        Returns:
+            The result; callers must treat it as read-only
+        """
+        key = (report, params)
+        cached = self.entries.get(key)
+        if cached is not None and cached[0] == self.version:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return cached[1]
+
+        self.misses += 1
+        result = compute()
+        self.entries[key] = (self.version, result)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return result
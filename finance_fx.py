@@ -0,0 +1,143 @@
+import array
+import bisect
+import csv
+import datetime
+import decimal
+import os
+import zlib
+
+BASE_CURRENCY = "USD"  # Currency reports and totals are shown in
+RATE_SCALE = 1000000  # Rates are stored as integer millionths of the base currency
+CURRENCY_SYMBOLS = {"USD": "$", "EUR": "€", "GBP": "£"}  # Other currencies are shown by code
+
+
+class RateTable:
+    """
+    Historical exchange rates into the base currency, read from a local CSV file.
+
+    The file has a header row and "date,currency,rate" rows, where rate is the
+    value of one unit of the currency in the base currency on that date. A
+    date between rows uses the latest earlier rate (the earliest rate before
+    the first row). Lookups are cached per (currency, day), and conversion is
+    done in integer arithmetic, rounding half up to whole cents.
+    """
+
+    def __init__(self, base_currency=BASE_CURRENCY):
+        """
+        Create a table that only knows the base currency.
+
+        Args:
+            base_currency (str): Currency every amount is converted into
+        """
+        self.base_currency = base_currency
+        self.days = {}  # currency -> array of day ordinals, ascending
+        self.rates = {}  # currency -> list of rates (millionths), parallel to days
+        self.fingerprint = ""  # Checksum of the loaded file, empty if none
+        self._cache = {}  # (currency, ordinal) -> rate
+
+    def load(self, path):
+        """
+        Read rates from a CSV file, replacing any loaded before.
+
+        Args:
+            path (str): The rate file (a missing file leaves only the base currency)
+
+        Raises:
+            ValueError: If a row has a bad date or rate (the table is left unchanged)
+        """
+        days = {}
+        rates = {}
+        fingerprint = ""
+        rows = []
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                content = file.read()
+            fingerprint = f"{zlib.crc32(content):08x}"
+            rows = self._parse(path, content)
+
+        for currency, ordinal, rate in sorted(rows):
+            days.setdefault(currency, array.array('i')).append(ordinal)
+            rates.setdefault(currency, []).append(rate)
+        self.days, self.rates, self.fingerprint, self._cache = days, rates, fingerprint, {}
+
+    @staticmethod
+    def _parse(path, content):
+        """Return (currency, ordinal, rate) tuples from the rate file's content."""
+        rows = []
+        for line_number, row in enumerate(csv.reader(content.decode("utf-8-sig").splitlines()), 1):
+            if line_number == 1 or not row:
+                continue
+            try:
+                ordinal = datetime.date.fromisoformat(row[0].strip()).toordinal()
+                rate = int(decimal.Decimal(row[2].strip()) * RATE_SCALE)
+            except (IndexError, ValueError, decimal.InvalidOperation):
+                raise ValueError(f"{path} line {line_number}: expected date,currency,rate")
+            rows.append((row[1].strip().upper(), ordinal, rate))
+        return rows
+
+    def currencies(self):
+        """Return the currencies amounts can be entered in, base currency first."""
+        return [self.base_currency] + sorted(currency for currency in self.days if currency != self.base_currency)
+
+    def rate(self, currency, ordinal):
+        """
+        Return the rate (millionths of the base currency) for a currency on a day.
+
+        Returns:
+            int: The rate, or None if the currency has no rates
+        """
+        if currency == self.base_currency:
+            return RATE_SCALE
+        key = (currency, ordinal)
+        rate = self._cache.get(key)
+        if rate is None:
+            days = self.days.get(currency)
+            if days is None:
+                return None
+            position = max(bisect.bisect_right(days, ordinal) - 1, 0)
+            rate = self._cache[key] = self.rates[currency][position]
+        return rate
+
+    def convert(self, amount, currency, ordinal):
+        """Convert cents in a currency on a day to base-currency cents (unknown currencies convert 1:1)."""
+        rate = self.rate(currency, ordinal)
+        if rate is None or rate == RATE_SCALE:
+            return amount
+        return (amount * rate + RATE_SCALE // 2) // RATE_SCALE
+
+    def to_base(self, transaction):
+        """Return a transaction dict's amount in base-currency cents."""
+        currency = transaction.get("currency", self.base_currency)
+        if currency == self.base_currency:
+            return transaction["amount"]
+        return self.convert(transaction["amount"], currency,
+                            datetime.date.fromisoformat(transaction["date"]).toordinal())
+
+    def convert_column(self, amounts, ordinals, currency_codes, currency_names):
+        """
+        Convert whole columns to base-currency cents.
+
+        Args:
+            amounts (array): Cents, each in its row's currency
+            ordinals (array): Day of each row
+            currency_codes (array): Index into currency_names for each row
+            currency_names (list): Currency of each code
+
+        Returns:
+            array: Base-currency cents ('q')
+        """
+        # Codes that convert 1:1: the base currency and currencies without rates
+        unconverted = {code for code, name in enumerate(currency_names)
+                       if name == self.base_currency or name not in self.days}
+        if len(unconverted) == len(currency_names):
+            return array.array('q', amounts)
+
+        # Look up one rate per distinct (currency, day), then convert every row with it
+        rates = {}
+        for key in set(zip(currency_codes, ordinals)):
+            rates[key] = RATE_SCALE if key[0] in unconverted else self.rate(currency_names[key[0]], key[1])
+        half = RATE_SCALE // 2
+        return array.array('q', [amount if rate == RATE_SCALE else (amount * rate + half) // RATE_SCALE
+                                 for amount, rate in zip(amounts, map(rates.__getitem__,
+                                                                      zip(currency_codes, ordinals)))])
+
@@ -0,0 +1,290 @@
+import concurrent.futures
+import collections
+import csv
+import datetime
+import os
+import re
+
+from finance_fx import BASE_CURRENCY, CURRENCY_SYMBOLS
+from finance_store import parse_cents
+
+# Date formats accepted in imported files, tried in order
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%Y%m%d"]
+
+# An amount with a currency code before or after it, e.g. "EUR 12.50" or "12.50 eur"
+AMOUNT_CODE = re.compile(r"(?:(?P<before>[A-Za-z]{3})\s*)?(?P<amount>[-+]?[\d.]+)(?:\s*(?P<after>[A-Za-z]{3}))?")
+
+# Header names recognised for each field in a CSV export
+CSV_COLUMNS = {
+    "date": ["date", "posted", "transaction date", "booking date"],
+    "description": ["description", "memo", "name", "payee", "details"],
+    "amount": ["amount", "value", "trnamt"],
+    "type": ["type", "transaction type"],
+    "category": ["category"],
+    "currency": ["currency", "ccy"]
+}
+
+# Keywords that map a description to one of the default categories
+CATEGORY_RULES = {
+    "Food": ["grocery", "groceries", "supermarket", "restaurant", "cafe", "coffee", "pizza", "bakery"],
+    "Transportation": ["uber", "lyft", "taxi", "fuel", "petrol", "gas station", "parking", "train", "bus"],
+    "Housing": ["rent", "mortgage", "landlord"],
+    "Entertainment": ["netflix", "spotify", "cinema", "theatre", "concert"],
+    "Utilities": ["electric", "water", "internet", "phone", "broadband"],
+    "Applications": ["app store", "google play", "subscription"]
+}
+
+IMPORT_CHUNK_SIZE = 5000  # Raw records handed to a worker at a time
+OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+OFX_CURRENCY = re.compile(r"<CURDEF>\s*(\w+)", re.IGNORECASE)
+
+
+def parse_date(text):
+    """Convert a date in any of DATE_FORMATS to YYYY-MM-DD, or raise ValueError."""
+    text = text.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"unrecognised date '{text}'")
+
+
+def parse_amount(text):
+    """
+    Convert an amount such as '-1,234.50', '$12', '€3' or '12.50 GBP' to integer cents.
+
+    Returns:
+        tuple: (cents, code of the currency the amount was marked with, or None)
+
+    Raises:
+        ValueError: If the text is not an amount
+    """
+    text = text.strip().replace(",", "")
+    currency = None
+    for code, symbol in CURRENCY_SYMBOLS.items():
+        if symbol in text:
+            text, currency = text.replace(symbol, ""), code
+            break
+    else:
+        match = AMOUNT_CODE.fullmatch(text)
+        if match and (match.group("before") or match.group("after")):
+            text, currency = match.group("amount"), (match.group("before") or match.group("after")).upper()
+    return parse_cents(text), currency
+
+
+def categorize(description, categories):
+    """
+    Pick a category for an imported expense.
+
+    Args:
+        description (str): Transaction description
+        categories (list): The tracker's current categories
+
+    Returns:
+        str: A category named in the description, else the first matching rule,
+             else "Other" (or the last category if there is no "Other")
+    """
+    text = description.lower()
+    for category in categories:
+        if category.lower() in text:
+            return category
+    for category, keywords in CATEGORY_RULES.items():
+        if category in categories and any(keyword in text for keyword in keywords):
+            return category
+    return "Other" if "Other" in categories else categories[-1]
+
+
+def build_transaction(date, description, amount, type_text, category, categories, currency="", currencies=None):
+    """
+    Validate one imported record and turn it into a transaction dict.
+
+    The type comes from type_text when given, otherwise from the sign of the
+    amount (negative amounts are expenses). Amounts are stored as positive values.
+    A blank currency means the base currency; others must be in currencies
+    when that list is given.
+    """
+    date = parse_date(date)
+    amount, marked_currency = parse_amount(amount)
+    if amount == 0:
+        raise ValueError("zero amount")
+
+    # A currency symbol or code on the amount stands in for a missing currency column
+    currency = (currency or "").strip().upper() or marked_currency or BASE_CURRENCY
+    if marked_currency and marked_currency != currency:
+        raise ValueError(f"amount is in {marked_currency} but the currency is {currency}")
+    if currencies is not None and currency not in currencies:
+        raise ValueError(f"no exchange rates for '{currency}'")
+
+    type_text = (type_text or "").strip().lower()
+    if type_text in ("income", "i", "credit", "cr"):
+        trans_type = "Income"
+    elif type_text in ("expense", "e", "debit", "dr"):
+        trans_type = "Expense"
+    elif type_text:
+        raise ValueError(f"unknown type '{type_text}'")
+    else:
+        trans_type = "Expense" if amount < 0 else "Income"
+
+    if trans_type == "Income":
+        category = "Income"
+    elif not category or category not in categories:
+        category = categorize(description, categories)
+
+    return {
+        "date": date,
+        "description": description.strip(),
+        "amount": abs(amount),
+        "currency": currency,
+        "type": trans_type,
+        "category": category
+    }
+
+
+def parse_csv_chunk(rows, columns, categories, currencies=None):
+    """
+    Parse a chunk of CSV rows in a worker process.
+
+    Args:
+        rows (list): Raw rows as lists of strings
+        columns (dict): Field name -> column position (None if absent)
+        categories (list): The tracker's current categories
+        currencies (list): Currencies with exchange rates (None: accept any)
+
+    Returns:
+        tuple: (list of transaction dicts, number of rejected rows)
+    """
+    def field(row, name):
+        position = columns[name]
+        return row[position] if position is not None and position < len(row) else ""
+
+    parsed = []
+    rejected = 0
+    for row in rows:
+        try:
+            parsed.append(build_transaction(field(row, "date"), field(row, "description"), field(row, "amount"),
+                                            field(row, "type"), field(row, "category"), categories,
+                                            field(row, "currency"), currencies))
+        except (ValueError, IndexError):
+            rejected += 1
+    return parsed, rejected
+
+
+def parse_ofx_chunk(blocks, categories, currency="", currencies=None):
+    """
+    Parse a chunk of OFX <STMTTRN> blocks in a worker process.
+
+    Every block takes the statement's currency (blank: the base currency).
+
+    Returns:
+        tuple: (list of transaction dicts, number of rejected blocks)
+    """
+    parsed = []
+    rejected = 0
+    for block in blocks:
+        fields = {name.upper(): value.strip() for name, value in OFX_FIELD.findall(block)}
+        description = fields.get("NAME") or fields.get("MEMO", "")
+        try:
+            parsed.append(build_transaction(fields.get("DTPOSTED", "")[:8], description,
+                                            fields.get("TRNAMT", ""), "", "", categories, currency, currencies))
+        except ValueError:
+            rejected += 1
+    return parsed, rejected
+
+
+def read_csv_chunks(path):
+    """
+    Stream a CSV file in chunks.
+
+    Returns:
+        tuple: (column mapping, generator of row chunks)
+    """
+    file = open(path, "r", newline="", encoding="utf-8-sig")
+    reader = csv.reader(file)
+    header = [name.strip().lower() for name in next(reader, [])]
+
+    columns = {}
+    for field, names in CSV_COLUMNS.items():
+        columns[field] = next((header.index(name) for name in names if name in header), None)
+    if columns["date"] is None or columns["amount"] is None:
+        file.close()
+        raise ValueError("CSV file needs at least a date and an amount column")
+
+    def chunks():
+        with file:
+            chunk = []
+            for row in reader:
+                chunk.append(row)
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    return columns, chunks()
+
+
+def read_ofx_chunks(path):
+    """Stream an OFX file as chunks of <STMTTRN> blocks, without reading it all at once."""
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        chunk = []
+        buffer = ""
+        for line in file:
+            buffer += line
+            if "</STMTTRN>" not in line.upper():
+                continue
+            chunk.extend(OFX_TRANSACTION.findall(buffer))
+            buffer = ""
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def read_ofx_currency(path):
+    """Return the statement currency (<CURDEF>) of an OFX file, or "" if it comes before none."""
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        for line in file:
+            match = OFX_CURRENCY.search(line)
+            if match:
+                return match.group(1).upper()
+            if "<STMTTRN>" in line.upper():
+                break
+    return ""
+
+
+def import_file(path, categories, workers=None, currencies=None):
+    """
+    Parse a CSV or OFX export in parallel, yielding batches as they complete.
+
+    Chunks are read lazily and at most two per worker are in flight, so memory
+    stays bounded however large the file is. Batches come back in file order.
+
+    Args:
+        path (str): CSV or OFX file to import
+        categories (list): The tracker's current categories
+        workers (int): Worker processes (default: one per CPU)
+        currencies (list): Currencies with exchange rates; rows in others are rejected
+
+    Yields:
+        tuple: (list of transaction dicts, number of rejected records)
+    """
+    workers = workers or os.cpu_count() or 1
+    if path.lower().endswith((".ofx", ".qfx")):
+        currency = read_ofx_currency(path)
+        chunks = read_ofx_chunks(path)
+        submit = lambda executor, chunk: executor.submit(parse_ofx_chunk, chunk, categories, currency, currencies)
+    else:
+        columns, chunks = read_csv_chunks(path)
+        submit = lambda executor, chunk: executor.submit(parse_csv_chunk, chunk, columns, categories, currencies)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(submit(executor, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,76 @@
+import time
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where locking is skipped
+    fcntl = None
+
+
+class FileLock:
+    """
+    Advisory lock on a file, shared between processes.
+
+    Uses POSIX record locks (fcntl.lockf), which belong to the process: a
+    shared lock can be upgraded to an exclusive one and back without being
+    released in between, and a failed upgrade leaves the shared lock in
+    place. Contention and time spent waiting are counted so they can be
+    reported.
+    """
+
+    def __init__(self, path):
+        """
+        Create a lock on a file (created on first use).
+
+        Args:
+            path (str): Path of the lock file
+        """
+        self.path = path
+        self.file = None
+        self.acquisitions = 0  # Successful acquire() calls
+        self.contended = 0  # Attempts that found the lock held by another process
+        self.wait_time = 0.0  # Seconds spent blocked waiting for the lock
+
+    def acquire(self, shared=False, blocking=True):
+        """
+        Take the lock, or change the mode of a lock already held.
+
+        Args:
+            shared (bool): Take a shared lock instead of an exclusive one
+            blocking (bool): Wait for the lock instead of giving up at once
+
+        Returns:
+            bool: True if the lock is now held in the requested mode
+        """
+        if fcntl is None:
+            self.acquisitions += 1
+            return True
+        if self.file is None:
+            self.file = open(self.path, "a+")
+
+        mode = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        try:
+            fcntl.lockf(self.file, mode | fcntl.LOCK_NB)
+        except OSError:
+            self.contended += 1
+            if not blocking:
+                return False
+            start_time = time.perf_counter()
+            fcntl.lockf(self.file, mode)
+            self.wait_time += time.perf_counter() - start_time
+        self.acquisitions += 1
+        return True
+
+    def release(self):
+        """Release the lock."""
+        if self.file is not None:
+            fcntl.lockf(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        """Hold the lock exclusively for the duration of a with block."""
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,399 @@
+import array
+import calendar
+import datetime
+import json
+import os
+import struct
+
+from finance_fx import BASE_CURRENCY
+from finance_store import LedgerStore, TransactionStore, TYPE_CODES, stored_cents
+
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "description_index.json"  # Saved description search index
+
+# Binary snapshot of a partition, kept beside its JSON file: a header, the
+# numeric columns as raw arrays, then the string dictionaries as JSON
+SNAPSHOT_MAGIC = b"FLS2"
+SNAPSHOT_HEADER = struct.Struct("<4sqqqq")  # magic, JSON size, JSON mtime (ns), rows, string table bytes
+SNAPSHOT_COLUMNS = [("dates", "i"), ("amounts", "q"), ("types", "b"), ("currency_codes", "i"),
+                    ("category_codes", "i"), ("description_codes", "i")]
+SNAPSHOT_STRINGS = ["currency_names", "category_names", "description_names"]
+
+
+def write_atomic(path, text):
+    """Write text to a temporary file next to path, then swap it into place."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+def month_bounds(year_month):
+    """Return the first and last date (YYYY-MM-DD) of a YYYY-MM month."""
+    year, month = int(year_month[:4]), int(year_month[5:7])
+    return f"{year_month}-01", f"{year_month}-{calendar.monthrange(year, month)[1]:02d}"
+
+
+def encode_columns(rows):
+    """Convert transaction dicts to the column form taken by TransactionStore.extend_columns."""
+    columns = {name: array.array(typecode) for name, typecode in SNAPSHOT_COLUMNS}
+    lookups = {}
+    for name in ("currency", "category", "description"):
+        columns[name + "_names"] = []
+        lookups[name] = {}
+    for row in rows:
+        columns["dates"].append(datetime.date.fromisoformat(row["date"]).toordinal())
+        columns["amounts"].append(stored_cents(row["amount"]))
+        columns["types"].append(TYPE_CODES[row["type"]])
+        for name, value in (("currency", row.get("currency", BASE_CURRENCY)), ("category", row["category"]),
+                            ("description", row["description"])):
+            code = lookups[name].get(value)
+            if code is None:
+                code = lookups[name][value] = len(columns[name + "_names"])
+                columns[name + "_names"].append(value)
+            columns[name + "_codes"].append(code)
+    return columns
+
+
+def snapshot_path(json_path):
+    """Return the path of the binary snapshot kept for a partition file."""
+    return json_path[:-len(".json")] + ".bin"
+
+
+def write_snapshot(json_path, columns):
+    """Save a partition's columns as a binary snapshot stamped with the JSON file's size and mtime."""
+    status = os.stat(json_path)
+    strings = json.dumps([columns[name] for name in SNAPSHOT_STRINGS], separators=(",", ":")).encode("utf-8")
+    parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, status.st_size, status.st_mtime_ns,
+                                  len(columns["dates"]), len(strings))]
+    parts.extend(columns[name].tobytes() for name, _ in SNAPSHOT_COLUMNS)
+    parts.append(strings)
+
+    temp_path = snapshot_path(json_path) + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(b"".join(parts))
+    os.replace(temp_path, snapshot_path(json_path))
+
+
+def read_snapshot(json_path):
+    """
+    Read a partition's binary snapshot if it is still fresh.
+
+    Args:
+        json_path (str): The partition's JSON file
+
+    Returns:
+        dict: Columns for TransactionStore.extend_columns, or None if there is no
+              snapshot, or it is damaged or older than the JSON file
+    """
+    try:
+        with open(snapshot_path(json_path), "rb") as file:
+            data = file.read()
+        magic, size, mtime, count, string_bytes = SNAPSHOT_HEADER.unpack_from(data)
+        status = os.stat(json_path)
+        if magic != SNAPSHOT_MAGIC or (size, mtime) != (status.st_size, status.st_mtime_ns):
+            return None
+
+        columns = {}
+        offset = SNAPSHOT_HEADER.size
+        view = memoryview(data)
+        for name, typecode in SNAPSHOT_COLUMNS:
+            column = array.array(typecode)
+            end = offset + count * column.itemsize
+            column.frombytes(view[offset:end])
+            columns[name] = column
+            offset = end
+        if offset + string_bytes != len(data):
+            return None
+        columns.update(zip(SNAPSHOT_STRINGS, json.loads(bytes(view[offset:]))))
+        return columns
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+class PartitionedLedger(LedgerStore):
+    """
+    Ledger stored as one JSON file per month, loaded lazily.
+
+    A small manifest lists every monthly partition with its row count and its
+    income/expense totals, overall and per category. Totals and the monthly
+    and category reports are answered from the manifest without opening any
+    partition. Queries load only the partitions their date range touches, and
+    saving rewrites only partitions that changed. Each partition also gets a
+    binary snapshot of its columns, which loads several times faster than
+    parsing the JSON and is ignored once it no longer matches the JSON file.
+
+    Saved partition files carry a generation number in their name. A save
+    writes new files first and then atomically replaces the manifest, so a
+    crash part-way through leaves the previous, consistent set in place.
+    """
+
+    def __init__(self, directory, rates=None):
+        """
+        Create a ledger backed by a directory of partition files.
+
+        Args:
+            directory (str): Directory holding the manifest and partitions
+            rates (RateTable): Exchange rates into the base currency
+        """
+        self.directory = directory
+        self.store = TransactionStore(rates)  # Rows of every loaded partition
+        self.partitions = {}  # YYYY-MM -> {"file", "rows", "loaded", "dirty"}
+        # Manifest totals for partitions that are not loaded: YYYY-MM ->
+        # {"totals": entry, "categories": {name: entry}}, entries laid out
+        # like TransactionStore rollup entries
+        self.cold_stats = {}
+        self._index_checked = False
+        self._index_saved = 0  # Descriptions covered by the index file on disk
+
+    def load_manifest(self):
+        """
+        Read the manifest without opening any partition.
+
+        Returns:
+            dict: The manifest (including saved metadata), or None if there is none
+        """
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+
+        with open(path, "r") as file:
+            manifest = json.load(file)
+        for year_month, info in manifest["partitions"].items():
+            self.partitions[year_month] = {"file": info["file"], "rows": info["rows"],
+                                           "loaded": False, "dirty": False}
+            self.cold_stats[year_month] = {
+                "totals": self._stored_entry(info["totals"]),
+                "categories": {category: self._stored_entry(entry) for category, entry in info["categories"].items()}
+            }
+
+        # Saved totals were converted with the rates of the time; recompute them if the rates changed
+        if manifest.get("fx_rates", "") != self.store.rates.fingerprint:
+            self._load_range()
+        return manifest
+
+    @staticmethod
+    def _stored_entry(entry):
+        """Convert the amounts of a saved rollup entry to integer cents."""
+        return [stored_cents(entry[0]), stored_cents(entry[1]), entry[2], entry[3]]
+
+    def _load(self, months):
+        """Load the given partitions (skipping loaded ones) into the store in one batch."""
+        batches = []
+        for year_month in sorted(months):
+            info = self.partitions.get(year_month)
+            if info is None or info["loaded"]:
+                continue
+            path = os.path.join(self.directory, info["file"])
+            columns = read_snapshot(path)
+            if columns is None:
+                with open(path, "r") as file:
+                    columns = encode_columns(json.load(file))
+                try:
+                    write_snapshot(path, columns)
+                except OSError:
+                    pass  # The snapshot only speeds up the next load
+            batches.append(columns)
+            info["loaded"] = True
+            # The store's rollups cover this month from now on
+            del self.cold_stats[year_month]
+        if batches:
+            self.store.extend_columns(batches)
+
+    def _load_range(self, first_month=None, last_month=None):
+        """Load every partition from first_month to last_month (YYYY-MM, None = unbounded)."""
+        self._load([year_month for year_month in self.partitions
+                    if (first_month is None or year_month >= first_month)
+                    and (last_month is None or year_month <= last_month)])
+
+    def _load_all(self):
+        """Load every partition, then reuse the saved description index if it can be."""
+        self._load_range()
+        if not self._index_checked:
+            self._index_checked = True
+            path = os.path.join(self.directory, INDEX_FILE)
+            if os.path.exists(path):
+                with open(path, "r") as file:
+                    self._index_saved = self.store.text_index.loads(file.read(), self.store.description_names)
+
+    def _touch(self, transactions):
+        """Load the partitions that new transactions fall into, so they can be rewritten whole."""
+        self._load({transaction["date"][:7] for transaction in transactions})
+
+    def _count(self, transactions):
+        """Record new transactions against their partitions."""
+        for transaction in transactions:
+            info = self.partitions.get(transaction["date"][:7])
+            if info is None:
+                info = self.partitions[transaction["date"][:7]] = {"file": None, "rows": 0,
+                                                                   "loaded": True, "dirty": False}
+            info["rows"] += 1
+            info["dirty"] = True
+
+    def __len__(self):
+        """Return the number of transactions, loaded or not."""
+        return sum(info["rows"] for info in self.partitions.values())
+
+    def __iter__(self):
+        """Iterate over all transactions as dicts."""
+        self._load_all()
+        return iter(self.store)
+
+    def rows(self, row_ids):
+        """Yield transaction dicts for row ids returned by a query."""
+        return self.store.rows(row_ids)
+
+    def append(self, transaction):
+        """Add one transaction to its monthly partition."""
+        self._touch([transaction])
+        self.store.append(transaction)
+        self._count([transaction])
+
+    def extend(self, transactions):
+        """Add several transactions to their monthly partitions."""
+        transactions = list(transactions)
+        self._touch(transactions)
+        self.store.extend(transactions)
+        self._count(transactions)
+
+    def totals(self):
+        """Return (income, expenses) over all partitions, loaded or not."""
+        income, expenses = self.store.totals()
+        for stats in self.cold_stats.values():
+            income += stats["totals"][TYPE_CODES["Income"]]
+            expenses += stats["totals"][TYPE_CODES["Expense"]]
+        return income, expenses
+
+    def category_totals(self, trans_type="Expense", year_month=None):
+        """Return {category: total} for one type, optionally within one month (YYYY-MM)."""
+        wanted = TYPE_CODES[trans_type]
+        if year_month is not None and year_month in self.cold_stats:
+            return {category: entry[wanted]
+                    for category, entry in self.cold_stats[year_month]["categories"].items() if entry[wanted + 2]}
+
+        totals = self.store.category_totals(trans_type, year_month)
+        if year_month is None:
+            for stats in self.cold_stats.values():
+                for category, entry in stats["categories"].items():
+                    if entry[wanted + 2]:
+                        totals[category] = totals.get(category, 0) + entry[wanted]
+        return totals
+
+    def monthly_totals(self):
+        """Return (YYYY-MM, income, expenses) tuples in chronological order."""
+        months = {year_month: (income, expenses) for year_month, income, expenses in self.store.monthly_totals()}
+        for year_month, stats in self.cold_stats.items():
+            months[year_month] = (stats["totals"][TYPE_CODES["Income"]], stats["totals"][TYPE_CODES["Expense"]])
+        return [(year_month, income, expenses) for year_month, (income, expenses) in sorted(months.items())]
+
+    def page_ids(self, column, reverse=False, offset=0, limit=50):
+        """Return one page of row ids ordered by "date", "amount" or "type"."""
+        self._load_all()
+        return self.store.page_ids(column, reverse, offset, limit)
+
+    def index_descriptions(self):
+        """Bring the description index of the loaded rows up to date."""
+        self.store.index_descriptions()
+
+    def find_description(self, query, match_all=True):
+        """Return row ids whose description contains the query terms, best matches first."""
+        self._load_all()
+        return self.store.find_description(query, match_all)
+
+    def find_date_range(self, start_date, end_date):
+        """Return row ids with start_date <= date <= end_date, loading only the months in range."""
+        self._load_range(start_date[:7], end_date[:7])
+        return self.store.find_date_range(start_date, end_date)
+
+    def find_amount_range(self, min_amount, max_amount):
+        """Return row ids with min_amount <= amount <= max_amount, smallest first."""
+        self._load_all()
+        return self.store.find_amount_range(min_amount, max_amount)
+
+    def find_category(self, category):
+        """Return row ids belonging to a category."""
+        self._load_all()
+        return self.store.find_category(category)
+
+    def balance_as_of(self, date):
+        """Return the balance up to and including date, loading only the months up to it."""
+        self._load_range(None, date[:7])
+        return self.store.balance_as_of(date)
+
+    def balance_between(self, start_date, end_date):
+        """Return the net change between two dates, loading only the months in range."""
+        self._load_range(start_date[:7], end_date[:7])
+        return self.store.balance_between(start_date, end_date)
+
+    def _partition_stats(self, year_month):
+        """Return the manifest totals of a loaded partition, read from the store's rollups."""
+        names = self.store.category_names
+        return {
+            "totals": self.store.monthly_rollup[year_month],
+            "categories": {names[code]: entry
+                           for code, entry in self.store.month_category_rollup[year_month].items()}
+        }
+
+    def save(self, generation, metadata):
+        """
+        Write changed partitions and a new manifest.
+
+        Args:
+            generation (int): Number embedded in new partition file names; must
+                              increase whenever the data changes
+            metadata (dict): Extra values stored in the manifest (e.g. categories)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Write new files for the changed partitions; the old ones stay until the manifest moves on
+        replaced = []
+        for year_month, info in self.partitions.items():
+            if not info["dirty"]:
+                continue
+            filename = f"{year_month}.{generation}.json"
+            first_day, last_day = month_bounds(year_month)
+            rows = list(self.store.rows(self.store.find_date_range(first_day, last_day)))
+            path = os.path.join(self.directory, filename)
+            write_atomic(path, json.dumps(rows, separators=(",", ":")))
+            write_snapshot(path, encode_columns(rows))
+            if info["file"] and info["file"] != filename:
+                replaced.append(info["file"])
+            info["file"] = filename
+
+        manifest = dict(metadata)
+        manifest["fx_rates"] = self.store.rates.fingerprint
+        manifest["partitions"] = {}
+        for year_month, info in sorted(self.partitions.items()):
+            stats = self.cold_stats[year_month] if not info["loaded"] else self._partition_stats(year_month)
+            manifest["partitions"][year_month] = {"file": info["file"], "rows": info["rows"],
+                                                  "totals": stats["totals"], "categories": stats["categories"]}
+        write_atomic(os.path.join(self.directory, MANIFEST_FILE), json.dumps(manifest, separators=(",", ":")))
+
+        for info in self.partitions.values():
+            info["dirty"] = False
+        for filename in replaced:
+            path = os.path.join(self.directory, filename)
+            os.remove(path)
+            if os.path.exists(snapshot_path(path)):
+                os.remove(snapshot_path(path))
+
+    def save_index(self):
+        """
+        Save the description search index if it covers descriptions the saved one doesn't.
+
+        The file is rewritten whole, so this is meant for the end of a
+        session rather than every save. It is skipped unless every partition
+        is loaded, since only then does the index cover every description.
+        """
+        if not all(info["loaded"] for info in self.partitions.values()):
+            return
+        self._load_all()  # Starts from the saved index, if it hasn't been read yet
+        self.store.index_descriptions()
+        if self.store.text_index.indexed == self._index_saved:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        write_atomic(os.path.join(self.directory, INDEX_FILE),
+                     self.store.text_index.dumps(self.store.description_names))
+        self._index_saved = self.store.text_index.indexed
@@ -0,0 +1,86 @@
+import calendar
+import datetime
+import uuid
+
+from finance_fx import BASE_CURRENCY
+
+# How often a schedule repeats; "interval" multiplies the unit (e.g. every 2 weeks)
+FREQUENCIES = ["daily", "weekly", "monthly", "yearly"]
+FREQUENCY_UNITS = {"daily": "days", "weekly": "weeks", "monthly": "months", "yearly": "years"}
+
+
+def new_schedule(transaction, frequency, interval=1, end_date=None):
+    """
+    Create a recurring schedule whose first occurrence is an existing transaction.
+
+    Args:
+        transaction (dict): The first occurrence (its date is the schedule's start)
+        frequency (str): One of FREQUENCIES
+        interval (int): Repeat every interval days/weeks/months/years
+        end_date (str): Last date an occurrence may fall on (YYYY-MM-DD), or None
+
+    Returns:
+        dict: The schedule, with "count" (occurrences already in the ledger) set to 1
+    """
+    return {
+        "id": uuid.uuid4().hex,
+        "description": transaction["description"],
+        "amount": transaction["amount"],
+        "currency": transaction.get("currency", BASE_CURRENCY),
+        "type": transaction["type"],
+        "category": transaction["category"],
+        "frequency": frequency,
+        "interval": interval,
+        "start": transaction["date"],
+        "end": end_date,
+        "count": 1
+    }
+
+
+def occurrence_date(schedule, number):
+    """
+    Return the date of a schedule's occurrence number (0 is the start date).
+
+    Monthly and yearly schedules keep the start date's day of the month,
+    falling back to the month's last day when it is shorter.
+    """
+    start = datetime.date.fromisoformat(schedule["start"])
+    step = number * schedule["interval"]
+    if schedule["frequency"] == "daily":
+        return start + datetime.timedelta(days=step)
+    if schedule["frequency"] == "weekly":
+        return start + datetime.timedelta(weeks=step)
+
+    months = start.month - 1 + step * (12 if schedule["frequency"] == "yearly" else 1)
+    year, month = start.year + months // 12, months % 12 + 1
+    return datetime.date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def due_occurrences(schedules, today):
+    """
+    List the occurrences of every schedule that are due but not yet in the ledger.
+
+    Args:
+        schedules (dict): Schedule id -> schedule
+        today (str): Latest date to materialise (YYYY-MM-DD)
+
+    Returns:
+        list: [schedule id, occurrence number, transaction dict] entries
+    """
+    occurrences = []
+    for schedule_id, schedule in schedules.items():
+        number = schedule["count"]
+        while True:
+            date = occurrence_date(schedule, number).isoformat()
+            if date > today or (schedule["end"] and date > schedule["end"]):
+                break
+            occurrences.append([schedule_id, number, {
+                "date": date,
+                "description": schedule["description"],
+                "amount": schedule["amount"],
+                "currency": schedule.get("currency", BASE_CURRENCY),
+                "type": schedule["type"],
+                "category": schedule["category"]
+            }])
+            number += 1
+    return occurrences
@@ -0,0 +1,396 @@
+import datetime
+import json
+import sqlite3
+
+from finance_fx import RATE_SCALE, RateTable
+from finance_stats import LedgerStats
+from finance_store import MAX_CENTS, LedgerStore
+
+# Row ids passed to a single "IN (...)" query, below SQLite's variable limit
+FETCH_BATCH_SIZE = 500
+
+# Sort keys accepted by page_ids -> the column each orders by
+SORT_COLUMNS = {"date": "date", "amount": "base_amount", "type": "type"}
+
+# Bumped whenever the schema changes; stored in the database's user_version
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    description TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    currency TEXT NOT NULL DEFAULT 'USD',
+    base_amount INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS idx_transactions_base_amount ON transactions (base_amount);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category);
+CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions (type, date);
+CREATE TABLE IF NOT EXISTS categories (
+    position INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS schedules (
+    id TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    month TEXT NOT NULL,
+    category TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (month, category)
+);
+"""
+
+
+class SQLiteStore(LedgerStore):
+    """
+    Finance tracker storage backed by a local SQLite database.
+
+    Nothing is loaded up front: queries and aggregations run inside SQLite
+    using its indexes, and only the rows being displayed are fetched, so
+    memory use stays flat as the ledger grows. Each row also stores its
+    amount in the base currency, which aggregations and amount queries use;
+    the column is recomputed whenever the exchange rate file changes.
+    """
+
+    def __init__(self, path, rates=None):
+        """
+        Open (or create) the database.
+
+        Args:
+            path (str): Path of the SQLite database file
+            rates (RateTable): Exchange rates into the base currency
+        """
+        self.rates = rates or RateTable()
+        self.connection = sqlite3.connect(path)
+        self._upgrade()
+        self.connection.executescript(SCHEMA)
+        if (self.load_setting("fx_rates") or "") != self.rates.fingerprint:
+            self._convert_base_amounts()
+        self._totals = None  # Cached (income, expenses), kept current by extend()
+        self._data_version = self._read_data_version()
+
+    def _upgrade(self):
+        """Bring a database created by an older version up to SCHEMA_VERSION."""
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        tables = self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+        if version == 1:
+            # Version 1 had no currencies: every amount was already in the base currency
+            self.connection.executescript("""
+                ALTER TABLE transactions ADD COLUMN currency TEXT NOT NULL DEFAULT 'USD';
+                ALTER TABLE transactions ADD COLUMN base_amount INTEGER NOT NULL DEFAULT 0;
+                UPDATE transactions SET base_amount = amount;
+                DROP INDEX IF EXISTS idx_transactions_amount;
+            """)
+        elif version == 0 and ("transactions",) in tables:
+            # Version 0 stored amounts as REAL currency units; convert them to integer cents
+            self.connection.executescript("""
+                ALTER TABLE transactions RENAME TO transactions_v0;
+                DROP INDEX IF EXISTS idx_transactions_date;
+                DROP INDEX IF EXISTS idx_transactions_amount;
+                DROP INDEX IF EXISTS idx_transactions_category;
+                DROP INDEX IF EXISTS idx_transactions_type;
+            """ + SCHEMA + """
+                INSERT INTO transactions (id, date, description, amount, type, category, base_amount)
+                    SELECT id, date, description, CAST(ROUND(amount * 100) AS INTEGER), type, category,
+                           CAST(ROUND(amount * 100) AS INTEGER)
+                    FROM transactions_v0;
+                DROP TABLE transactions_v0;
+            """)
+        if version < 3:
+            # Version 2 kept every schedule in one settings value, which each session rewrote whole
+            self.connection.executescript(SCHEMA)
+            saved = self.load_setting("schedules")
+            if saved:
+                self.save_schedules(saved.values())
+            self.connection.execute("DELETE FROM settings WHERE name = 'schedules'")
+        if version < 4:
+            # Version 3 kept all statistics in one settings value, rewritten whole on every insert
+            self.connection.executescript(SCHEMA)
+            saved = self.load_setting("stats")
+            if saved:
+                self.save_stats(LedgerStats.loads(saved))
+            self.connection.execute("DELETE FROM settings WHERE name = 'stats'")
+        if version != SCHEMA_VERSION:
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.connection.commit()
+
+    def _convert_base_amounts(self):
+        """Recompute every row's base-currency amount with the current rates, one update per (currency, day)."""
+        base = self.rates.base_currency
+        self.connection.execute("UPDATE transactions SET base_amount = amount WHERE currency = ?", (base,))
+        pairs = self.connection.execute(
+            "SELECT DISTINCT currency, date FROM transactions WHERE currency != ?", (base,)).fetchall()
+        updates = []
+        for currency, date in pairs:
+            rate = self.rates.rate(currency, datetime.date.fromisoformat(date).toordinal())
+            updates.append((rate if rate is not None else RATE_SCALE, currency, date))
+        self.connection.executemany(
+            f"UPDATE transactions SET base_amount = (amount * ? + {RATE_SCALE // 2}) / {RATE_SCALE} "
+            f"WHERE currency = ? AND date = ?", updates)
+        self.save_setting("fx_rates", self.rates.fingerprint)
+        self.connection.commit()
+        self._totals = None
+
+    def __len__(self):
+        """Return the number of stored transactions."""
+        # Rows are never deleted, so the highest id is the row count
+        return self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+
+    def __iter__(self):
+        """Iterate over all transactions as dicts (in insertion order)."""
+        cursor = self.connection.execute(
+            "SELECT date, description, amount, type, category, currency FROM transactions ORDER BY id")
+        for row in cursor:
+            yield self._to_dict(row)
+
+    @staticmethod
+    def _to_dict(row):
+        """Convert a (date, description, amount, type, category, currency) row to a transaction dict."""
+        return {
+            "date": row[0],
+            "description": row[1],
+            "amount": row[2],
+            "currency": row[5],
+            "type": row[3],
+            "category": row[4]
+        }
+
+    def rows(self, row_ids):
+        """Yield transaction dicts for the given row ids, in the given order."""
+        row_ids = list(row_ids)
+        for start in range(0, len(row_ids), FETCH_BATCH_SIZE):
+            batch = row_ids[start:start + FETCH_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            fetched = {row[0]: row[1:] for row in self.connection.execute(
+                f"SELECT id, date, description, amount, type, category, currency FROM transactions "
+                f"WHERE id IN ({placeholders})", batch)}
+            for row_id in batch:
+                yield self._to_dict(fetched[row_id])
+
+    def append(self, transaction):
+        """Insert one transaction (call commit() to make it durable)."""
+        self.extend([transaction])
+
+    def extend(self, transactions):
+        """Insert several transactions (call commit() to make them durable)."""
+        rows = [(transaction["date"], transaction["description"], transaction["amount"], transaction["type"],
+                 transaction["category"], transaction.get("currency", self.rates.base_currency),
+                 self.rates.to_base(transaction)) for transaction in transactions]
+        for row in rows:
+            if abs(row[2]) > MAX_CENTS or abs(row[6]) > MAX_CENTS:
+                raise ValueError(f"invalid amount {row[2]}: too large")
+        self.connection.executemany(
+            "INSERT INTO transactions (date, description, amount, type, category, currency, base_amount) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+        # Keep the cached totals current instead of re-aggregating the table
+        if self._totals is not None:
+            income, expenses = self._totals
+            for row in rows:
+                if row[3] == "Income":
+                    income += row[6]
+                else:
+                    expenses += row[6]
+            self._totals = (income, expenses)
+
+    def _read_data_version(self):
+        """Return SQLite's counter of commits made by other connections."""
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def refresh(self):
+        """Drop cached values if another process committed since the last check; return True if so."""
+        data_version = self._read_data_version()
+        if data_version == self._data_version:
+            return False
+        self._data_version = data_version
+        self._totals = None
+        return True
+
+    def begin(self):
+        """
+        Start a write transaction, waiting for any other writer to finish.
+
+        Until the next commit(), no other connection can write, so values
+        read in between can be updated without losing another session's
+        changes. Pending inserts are committed first.
+        """
+        self.connection.commit()
+        self.connection.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        """Commit pending inserts to the database file."""
+        self.connection.commit()
+
+    def close(self):
+        """Commit and close the database connection."""
+        self.connection.commit()
+        self.connection.close()
+
+    def load_categories(self):
+        """Return the saved categories in their original order."""
+        return [row[0] for row in self.connection.execute("SELECT name FROM categories ORDER BY position")]
+
+    def save_categories(self, categories):
+        """Replace the saved categories with the given list."""
+        self.connection.execute("DELETE FROM categories")
+        self.connection.executemany("INSERT INTO categories (position, name) VALUES (?, ?)",
+                                    enumerate(categories))
+
+    def load_setting(self, name):
+        """Return a value saved with save_setting, or None if there is none."""
+        row = self.connection.execute("SELECT value FROM settings WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_setting(self, name, value):
+        """Save a JSON-compatible value under a name (call commit() to make it durable)."""
+        self.connection.execute("INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)",
+                                (name, json.dumps(value, separators=(",", ":"))))
+
+    def load_schedules(self):
+        """Return the saved recurring schedules as a dict of schedule id -> schedule."""
+        return {row[0]: json.loads(row[1]) for row in self.connection.execute("SELECT id, value FROM schedules")}
+
+    def save_schedules(self, schedules):
+        """Save schedule dicts, one row each, replacing those with the same ids (call commit() to make them durable)."""
+        self.connection.executemany("INSERT OR REPLACE INTO schedules (id, value) VALUES (?, ?)",
+                                    [(schedule["id"], json.dumps(schedule, separators=(",", ":")))
+                                     for schedule in schedules])
+
+    def load_stats(self, rates=None):
+        """Return the saved LedgerStats, or None if none were saved."""
+        count = self.load_setting("stats_count")
+        if count is None:
+            return None
+        entries = {(row[0], row[1]): json.loads(row[2])
+                   for row in self.connection.execute("SELECT month, category, value FROM stats")}
+        ledger_stats = LedgerStats.from_entries(count, entries, rates)
+        ledger_stats.fx_rates = self.load_setting("stats_fx_rates") or ""
+        return ledger_stats
+
+    def save_stats(self, ledger_stats):
+        """Replace the saved statistics with a LedgerStats (call commit() to make it durable)."""
+        self.connection.execute("DELETE FROM stats")
+        self._write_stats(ledger_stats.entries())
+        self.save_setting("stats_count", ledger_stats.count)
+        self.save_setting("stats_fx_rates", ledger_stats.fx_rates)
+
+    def add_stats(self, added):
+        """
+        Merge the statistics of newly inserted transactions into the saved ones.
+
+        Only the entries for the categories and months the new transactions
+        fall in are read and rewritten, inside the write transaction, so
+        sessions adding transactions at the same time don't overwrite each
+        other's statistics (call commit() to make them durable).
+
+        Args:
+            added (LedgerStats): Statistics of just the new transactions
+        """
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN IMMEDIATE")
+        entries = added.entries()
+        saved = {}
+        for month, category in entries:
+            row = self.connection.execute("SELECT value FROM stats WHERE month = ? AND category = ?",
+                                          (month, category)).fetchone()
+            if row:
+                saved[(month, category)] = json.loads(row[0])
+        merged = LedgerStats.from_entries(self.load_setting("stats_count") or 0, saved)
+        merged.merge(added)
+        self._write_stats(merged.entries())
+        self.save_setting("stats_count", merged.count)
+
+    def _write_stats(self, entries):
+        """Write (month, category) -> value statistics entries, replacing existing ones."""
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO stats (month, category, value) VALUES (?, ?, ?)",
+            [(month, category, json.dumps(value, separators=(",", ":")))
+             for (month, category), value in entries.items()])
+
+    def totals(self):
+        """Return (income, expenses) summed over all transactions."""
+        if self._totals is None:
+            sums = dict(self.connection.execute("SELECT type, SUM(base_amount) FROM transactions GROUP BY type"))
+            self._totals = (sums.get("Income", 0), sums.get("Expense", 0))
+        return self._totals
+
+    def category_totals(self, trans_type="Expense", year_month=None):
+        """Return {category: total} for one type, optionally within one month (YYYY-MM)."""
+        query = "SELECT category, SUM(base_amount) FROM transactions WHERE type = ?"
+        parameters = [trans_type]
+        if year_month is not None:
+            # ISO dates compare correctly as strings, so this uses the date index
+            query += " AND date BETWEEN ? AND ?"
+            parameters += [year_month + "-01", year_month + "-31"]
+        return dict(self.connection.execute(query + " GROUP BY category", parameters))
+
+    def monthly_totals(self):
+        """Return (YYYY-MM, income, expenses) tuples in chronological order."""
+        return self.connection.execute(
+            "SELECT substr(date, 1, 7) AS month, "
+            "COALESCE(SUM(CASE WHEN type = 'Income' THEN base_amount ELSE 0 END), 0), "
+            "COALESCE(SUM(CASE WHEN type = 'Expense' THEN base_amount ELSE 0 END), 0) "
+            "FROM transactions GROUP BY month ORDER BY month").fetchall()
+
+    def _ids(self, query, parameters=()):
+        """Run a query selecting ids and return them as a list."""
+        return [row[0] for row in self.connection.execute(query, parameters)]
+
+    def page_ids(self, column, reverse=False, offset=0, limit=50):
+        """Return one page of row ids ordered by "date", "amount" or "type" (ValueError for others)."""
+        if column not in SORT_COLUMNS:
+            raise ValueError(f"cannot sort by '{column}'")
+        direction = "DESC" if reverse else "ASC"
+        return self._ids(f"SELECT id FROM transactions ORDER BY {SORT_COLUMNS[column]} {direction}, id {direction} "
+                         f"LIMIT ? OFFSET ?", (limit, offset))
+
+    def find_description(self, query, match_all=True):
+        """Return row ids whose description contains the query terms, best matches first."""
+        terms = query.lower().split()
+        if not terms:
+            return []
+
+        # Escape LIKE wildcards so terms are matched literally
+        patterns = ["%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                    for term in terms]
+        condition = "LOWER(description) LIKE ? ESCAPE '\\'"
+        where = (" AND " if match_all else " OR ").join([condition] * len(terms))
+        score = " + ".join([f"({condition})"] * len(terms))
+        return self._ids(f"SELECT id FROM transactions WHERE {where} ORDER BY {score} DESC, id",
+                         patterns + patterns)
+
+    def find_date_range(self, start_date, end_date):
+        """Return row ids with start_date <= date <= end_date (YYYY-MM-DD strings), oldest first."""
+        return self._ids("SELECT id FROM transactions WHERE date BETWEEN ? AND ? ORDER BY date, id",
+                         (start_date, end_date))
+
+    def find_amount_range(self, min_amount, max_amount):
+        """Return row ids with min_amount <= amount <= max_amount, smallest first."""
+        return self._ids("SELECT id FROM transactions WHERE base_amount BETWEEN ? AND ? ORDER BY base_amount, id",
+                         (min_amount, max_amount))
+
+    def find_category(self, category):
+        """Return row ids belonging to a category."""
+        return self._ids("SELECT id FROM transactions WHERE category = ? ORDER BY id", (category,))
+
+    def balance_as_of(self, date):
+        """Return income minus expenses over all transactions up to and including date (YYYY-MM-DD)."""
+        return self.connection.execute(
+            "SELECT COALESCE(SUM(CASE WHEN type = 'Income' THEN base_amount ELSE -base_amount END), 0) "
+            "FROM transactions WHERE date <= ?", (date,)).fetchone()[0]
+
+    def balance_between(self, start_date, end_date):
+        """Return income minus expenses for start_date <= date <= end_date (YYYY-MM-DD strings)."""
+        return self.connection.execute(
+            "SELECT COALESCE(SUM(CASE WHEN type = 'Income' THEN base_amount ELSE -base_amount END), 0) "
+            "FROM transactions WHERE date BETWEEN ? AND ?", (start_date, end_date)).fetchone()[0]
@@ -0,0 +1,237 @@
+import math
+
+SKETCH_ACCURACY = 0.01  # Relative error of quantiles read from a QuantileSketch
+OUTLIER_MIN_COUNT = 10  # Expenses a category needs before outliers are flagged
+OUTLIER_Z_SCORE = 3.0  # Standard deviations above the mean that count as an outlier
+OUTLIER_QUANTILE = 0.99  # ...and the quantile an outlier must also exceed
+
+
+class RunningStats:
+    """
+    Count, exact total, mean and variance of a stream of amounts.
+
+    Uses Welford's method, so each update is O(1) and numerically stable
+    without keeping the amounts themselves.
+    """
+
+    def __init__(self, count=0, total=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.total = total  # Integer cents, kept exactly
+        self.mean = mean
+        self.m2 = m2  # Sum of squared differences from the mean
+
+    def add(self, amount):
+        """Add one amount (integer cents)."""
+        self.count += 1
+        self.total += amount
+        delta = amount - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (amount - self.mean)
+
+    def merge(self, other):
+        """Add the amounts summarised by another RunningStats (Chan et al.'s parallel update)."""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+
+    def stddev(self):
+        """Return the sample standard deviation (0 with fewer than two amounts)."""
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def dumps(self):
+        """Return the statistics as a JSON-compatible list."""
+        return [self.count, self.total, self.mean, self.m2]
+
+    @classmethod
+    def loads(cls, values):
+        """Rebuild statistics saved with dumps()."""
+        return cls(*values)
+
+
+class QuantileSketch:
+    """
+    Streaming quantile estimates for positive amounts.
+
+    Amounts are counted in logarithmic buckets (as in DDSketch), so any
+    quantile is returned within SKETCH_ACCURACY relative error. Adding an
+    amount is O(1), and the number of buckets grows only with the logarithm
+    of the range of amounts seen, not with how many there are.
+    """
+
+    def __init__(self, buckets=None):
+        self.gamma_log = math.log((1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY))
+        self.buckets = buckets or {}  # Bucket index -> number of amounts
+        self.count = sum(self.buckets.values())
+
+    def add(self, amount):
+        """Add one amount (integer cents, at least 1)."""
+        index = math.ceil(math.log(max(amount, 1)) / self.gamma_log)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+
+    def merge(self, other):
+        """Add the amounts counted by another sketch."""
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+
+    def quantile(self, q):
+        """Return an estimate of the q-th quantile (0 <= q <= 1), or None if empty."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Midpoint of the bucket in relative terms
+                return 2 * math.exp(index * self.gamma_log) / (1 + math.exp(self.gamma_log))
+        return None
+
+    def dumps(self):
+        """Return the buckets as a JSON-compatible dict."""
+        return {str(index): count for index, count in self.buckets.items()}
+
+    @classmethod
+    def loads(cls, buckets):
+        """Rebuild a sketch saved with dumps()."""
+        return cls({int(index): count for index, count in buckets.items()})
+
+
+class LedgerStats:
+    """
+    Statistics kept up to date as transactions are added.
+
+    Tracks running statistics and a quantile sketch per category, and running
+    statistics per category per month, so outlier and budget checks never
+    need a pass over the ledger. The whole state round-trips through
+    dumps()/loads() and is saved alongside the ledger. Amounts are tracked in
+    the base currency when a rate table is given.
+    """
+
+    def __init__(self, rates=None):
+        self.rates = rates  # RateTable for converting amounts, or None
+        self.fx_rates = rates.fingerprint if rates else ""  # Fingerprint of the rates the amounts were converted with
+        self.count = 0  # Transactions seen, to detect statistics out of step with the ledger
+        self.categories = {}  # category -> RunningStats
+        self.sketches = {}  # category -> QuantileSketch
+        self.months = {}  # YYYY-MM -> {category: RunningStats}
+
+    def add(self, transaction):
+        """Update every statistic for one transaction dict."""
+        category = transaction["category"]
+        amount = self.rates.to_base(transaction) if self.rates else transaction["amount"]
+        self.count += 1
+        if category not in self.categories:
+            self.categories[category] = RunningStats()
+            self.sketches[category] = QuantileSketch()
+        self.categories[category].add(amount)
+        self.sketches[category].add(amount)
+
+        month = self.months.setdefault(transaction["date"][:7], {})
+        if category not in month:
+            month[category] = RunningStats()
+        month[category].add(amount)
+
+    def extend(self, transactions):
+        """Update the statistics for several transactions."""
+        for transaction in transactions:
+            self.add(transaction)
+
+    def merge(self, other):
+        """Add the statistics of another LedgerStats, such as one covering newly added transactions."""
+        self.count += other.count
+        for category, stats in other.categories.items():
+            if category not in self.categories:
+                self.categories[category] = RunningStats()
+                self.sketches[category] = QuantileSketch()
+            self.categories[category].merge(stats)
+            self.sketches[category].merge(other.sketches[category])
+        for year_month, month in other.months.items():
+            merged = self.months.setdefault(year_month, {})
+            for category, stats in month.items():
+                if category not in merged:
+                    merged[category] = RunningStats()
+                merged[category].merge(stats)
+
+    def is_outlier(self, category, amount):
+        """
+        Check whether an amount is unusually large for its category.
+
+        Args:
+            category (str): Category the amount would be added to
+            amount (int): Amount in (base-currency) cents
+
+        Returns:
+            bool: True if the category has enough history and the amount lies
+                  both OUTLIER_Z_SCORE deviations above the mean and above the
+                  OUTLIER_QUANTILE quantile
+        """
+        stats = self.categories.get(category)
+        if stats is None or stats.count < OUTLIER_MIN_COUNT:
+            return False
+        return (amount > stats.mean + OUTLIER_Z_SCORE * stats.stddev()
+                and amount > self.sketches[category].quantile(OUTLIER_QUANTILE))
+
+    def month_total(self, category, year_month):
+        """Return the amount recorded against a category in one month (YYYY-MM), in cents."""
+        stats = self.months.get(year_month, {}).get(category)
+        return stats.total if stats is not None else 0
+
+    def dumps(self):
+        """Return the statistics as a JSON-compatible dict."""
+        return {
+            "count": self.count,
+            "fx_rates": self.fx_rates,
+            "categories": {category: {"stats": stats.dumps(), "sketch": self.sketches[category].dumps()}
+                           for category, stats in self.categories.items()},
+            "months": {year_month: {category: stats.dumps() for category, stats in month.items()}
+                       for year_month, month in self.months.items()}
+        }
+
+    def entries(self):
+        """
+        Return the statistics as separately storable entries.
+
+        Returns:
+            dict: (YYYY-MM, category) -> JSON-compatible value; the month is ""
+                  for a category's all-time statistics and sketch
+        """
+        entries = {("", category): {"stats": stats.dumps(), "sketch": self.sketches[category].dumps()}
+                   for category, stats in self.categories.items()}
+        for year_month, month in self.months.items():
+            for category, stats in month.items():
+                entries[(year_month, category)] = stats.dumps()
+        return entries
+
+    @classmethod
+    def from_entries(cls, count, entries, rates=None):
+        """Rebuild statistics from a transaction count and entries returned by entries() (fx_rates is left to the caller)."""
+        ledger_stats = cls(rates)
+        ledger_stats.count = count
+        for (year_month, category), value in entries.items():
+            if year_month:
+                ledger_stats.months.setdefault(year_month, {})[category] = RunningStats.loads(value)
+            else:
+                ledger_stats.categories[category] = RunningStats.loads(value["stats"])
+                ledger_stats.sketches[category] = QuantileSketch.loads(value["sketch"])
+        return ledger_stats
+
+    @classmethod
+    def loads(cls, data, rates=None):
+        """Rebuild statistics saved with dumps()."""
+        ledger_stats = cls(rates)
+        ledger_stats.count = data["count"]
+        ledger_stats.fx_rates = data.get("fx_rates", "")
+        for category, saved in data["categories"].items():
+            ledger_stats.categories[category] = RunningStats.loads(saved["stats"])
+            ledger_stats.sketches[category] = QuantileSketch.loads(saved["sketch"])
+        for year_month, month in data["months"].items():
+            ledger_stats.months[year_month] = {category: RunningStats.loads(values)
+                                               for category, values in month.items()}
+        return ledger_stats
@@ -0,0 +1,766 @@
+import abc
+import array
+import bisect
+import datetime
+import decimal
+import json
+import re
+
+from finance_fx import BASE_CURRENCY, RateTable
+
+# Transaction types, ordered so that sorting by type code matches sorting by name
+TRANSACTION_TYPES = ["Expense", "Income"]
+TYPE_CODES = {name: code for code, name in enumerate(TRANSACTION_TYPES)}
+
+# Batches at least this large rebuild the sorted indexes instead of inserting row by row
+REINDEX_BATCH_SIZE = 64
+
+# Length of the character n-grams used for substring search
+NGRAM_SIZE = 3
+
+# Largest amount, in cents, that fits the stores' 64-bit amount columns
+MAX_CENTS = 2 ** 63 - 1
+
+
+def parse_cents(text):
+    """
+    Convert an amount in currency units (e.g. "12.34" or 12.34) to integer cents.
+
+    Half-cent values are rounded away from zero. Raises ValueError if the
+    value is not a finite number or is more than MAX_CENTS cents either way.
+    """
+    try:
+        value = decimal.Decimal(str(text).strip())
+        if not value.is_finite():
+            raise ValueError(f"invalid amount '{text}'")
+        # Check the size before scaling, as a huge exponent would overflow the decimal context
+        if value.adjusted() > 20 or abs(value) * 100 > MAX_CENTS:
+            raise ValueError(f"invalid amount '{text}': too large")
+        cents = int((value * 100).to_integral_value(decimal.ROUND_HALF_UP))
+    except ArithmeticError:
+        # decimal's InvalidOperation, Overflow and other signals
+        raise ValueError(f"invalid amount '{text}'")
+    if abs(cents) > MAX_CENTS:
+        raise ValueError(f"invalid amount '{text}': too large")
+    return cents
+
+
+def stored_cents(value):
+    """
+    Convert an amount read back from a saved file to integer cents.
+
+    Amounts are saved as integer cents; floats can only come from files
+    written before that change, which stored currency units.
+    """
+    if isinstance(value, float):
+        return parse_cents(repr(value))
+    return value
+
+
+class DescriptionIndex:
+    """
+    Full-text index over the distinct transaction descriptions.
+
+    Because descriptions are dictionary-encoded, the index maps words and
+    character n-grams to description codes rather than to individual rows:
+    - an inverted index from whole words (tokens) to codes, used for ranking
+    - an n-gram index from every NGRAM_SIZE-character slice to codes, used to
+      find substring matches without scanning every description
+    """
+
+    def __init__(self):
+        """Create an empty index."""
+        self.tokens = {}  # word -> set of description codes
+        self.ngrams = {}  # n-gram -> set of description codes
+        self.indexed = 0  # Number of descriptions (codes 0..indexed-1) already indexed
+
+    @staticmethod
+    def tokenize(text):
+        """Split a description into lowercase words."""
+        return re.findall(r"\w+", text.lower())
+
+    def update(self, names):
+        """
+        Index any descriptions added since the last update.
+
+        Args:
+            names (list): The store's description dictionary (code -> text)
+        """
+        for code in range(self.indexed, len(names)):
+            self._add(code, names[code])
+        self.indexed = len(names)
+
+    def _add(self, code, text):
+        """Index one description under its code."""
+        text = text.lower()
+        for token in self.tokenize(text):
+            self.tokens.setdefault(token, set()).add(code)
+        for start in range(len(text) - NGRAM_SIZE + 1):
+            self.ngrams.setdefault(text[start:start + NGRAM_SIZE], set()).add(code)
+
+    def match_term(self, term, names):
+        """Return the codes of descriptions containing term as a substring."""
+        if len(term) < NGRAM_SIZE:
+            # Too short for the n-gram index: test each distinct description once
+            return {code for code in range(self.indexed) if term in names[code].lower()}
+
+        # Candidates must contain every n-gram of the term; confirm the actual substring
+        candidates = None
+        for start in range(len(term) - NGRAM_SIZE + 1):
+            codes = self.ngrams.get(term[start:start + NGRAM_SIZE], set())
+            candidates = codes if candidates is None else candidates & codes
+            if not candidates:
+                return set()
+        return {code for code in candidates if term in names[code].lower()}
+
+    def search(self, query, names, match_all=True):
+        """
+        Find descriptions matching a multi-term query, best matches first.
+
+        Args:
+            query (str): Space-separated search terms
+            names (list): The store's description dictionary (code -> text)
+            match_all (bool): Require every term (AND) rather than any term (OR)
+
+        Returns:
+            list: Description codes ordered by score, then by code
+        """
+        scores = {}
+        matched_sets = []
+        for term in query.lower().split():
+            matches = self.match_term(term, names)
+            matched_sets.append(matches)
+            # A whole-word match scores higher than a match inside a longer word
+            whole_words = self.tokens.get(term, set())
+            for code in matches:
+                scores[code] = scores.get(code, 0) + (2 if code in whole_words else 1)
+
+        if not matched_sets:
+            return []
+        if match_all:
+            selected = set.intersection(*matched_sets)
+        else:
+            selected = set.union(*matched_sets)
+        return sorted(selected, key=lambda code: (-scores[code], code))
+
+    def dumps(self, names):
+        """
+        Serialise the index to a JSON string.
+
+        Codes depend on the order descriptions were loaded in, so the indexed
+        descriptions are saved too, and the codes in the file are positions
+        in that list.
+        """
+        data = {
+            "descriptions": names[:self.indexed],
+            "tokens": {token: sorted(codes) for token, codes in self.tokens.items()},
+            "ngrams": {ngram: sorted(codes) for ngram, codes in self.ngrams.items()}
+        }
+        return json.dumps(data, separators=(",", ":"))
+
+    def loads(self, text, names):
+        """
+        Replace the index with one serialised by dumps(), mapped onto the current codes.
+
+        Descriptions added since the index was saved are indexed on top of it.
+
+        Args:
+            text (str): The saved index
+            names (list): The store's description dictionary (code -> text)
+
+        Returns:
+            int: Number of descriptions the saved index covered, or 0 if it names
+                 descriptions the store doesn't have (or is in an older format)
+        """
+        data = json.loads(text)
+        saved = data["descriptions"]
+        if not isinstance(saved, list):
+            return 0
+        codes = {name: code for code, name in enumerate(names)}
+        try:
+            remap = [codes[name] for name in saved]
+        except KeyError:
+            return 0
+
+        self.tokens = {token: {remap[position] for position in positions}
+                       for token, positions in data["tokens"].items()}
+        self.ngrams = {ngram: {remap[position] for position in positions}
+                       for ngram, positions in data["ngrams"].items()}
+        for code in sorted(set(range(len(names))).difference(remap)):
+            self._add(code, names[code])
+        self.indexed = len(names)
+        return len(saved)
+
+
+class BalanceIndex:
+    """
+    Fenwick (binary indexed) tree of net amounts (in cents) per day.
+
+    Income counts as positive and expenses as negative. Each slot covers one
+    calendar day, so the balance up to any date is a prefix sum answered in
+    O(log days), and transactions may be added for any date in any order.
+    The covered date span grows on demand.
+    """
+
+    def __init__(self):
+        """Create an empty index."""
+        self.first_day = None  # Ordinal of the day in slot 0
+        self.daily = array.array('q')  # Net amount per day
+        self.tree = array.array('q')  # Fenwick tree over daily (slot i holds node i + 1)
+
+    def add(self, ordinal, amount):
+        """
+        Add a signed amount on a day.
+
+        Args:
+            ordinal (int): Day as a proleptic Gregorian ordinal
+            amount (int): Cents, positive for income and negative for expenses
+        """
+        if self.first_day is None or not self.first_day <= ordinal < self.first_day + len(self.daily):
+            self._grow(ordinal)
+
+        position = ordinal - self.first_day
+        self.daily[position] += amount
+        node = position + 1
+        while node <= len(self.tree):
+            self.tree[node - 1] += amount
+            node += node & -node
+
+    def balance_through(self, ordinal):
+        """Return the net amount of all days up to and including ordinal."""
+        if self.first_day is None or ordinal < self.first_day:
+            return 0
+
+        node = min(ordinal - self.first_day + 1, len(self.tree))
+        total = 0
+        while node > 0:
+            total += self.tree[node - 1]
+            node -= node & -node
+        return total
+
+    def _grow(self, ordinal):
+        """Widen the covered span to include ordinal (at least doubling it) and rebuild the tree."""
+        if self.first_day is None:
+            first_day, size = ordinal, 1
+        else:
+            last_day = self.first_day + len(self.daily) - 1
+            size = max(len(self.daily) * 2, max(last_day, ordinal) - min(self.first_day, ordinal) + 1)
+            if ordinal < self.first_day:
+                first_day = min(ordinal, last_day - size + 1)
+            else:
+                first_day = self.first_day
+
+        daily = array.array('q', bytes(8 * size))
+        if self.first_day is not None:
+            offset = self.first_day - first_day
+            daily[offset:offset + len(self.daily)] = self.daily
+
+        # Build the Fenwick tree in O(size): push each node's sum to its parent
+        tree = array.array('q', daily)
+        for node in range(1, size + 1):
+            parent = node + (node & -node)
+            if parent <= size:
+                tree[parent - 1] += tree[node - 1]
+
+        self.first_day = first_day
+        self.daily = daily
+        self.tree = tree
+
+
+class LedgerStore(abc.ABC):
+    """
+    Interface shared by the finance tracker's storage backends.
+
+    Transactions are identified by integer row ids. Queries return lists of
+    row ids and rows() turns those into transaction dicts, so reports only
+    materialise the rows they display. Aggregates are computed by the backend.
+    All amounts (in transaction dicts, totals and query bounds) are integer
+    cents, so totals are exact however the data is stored or split. A
+    transaction's amount is in its own currency; totals, balances and amount
+    queries use amounts converted to the base currency. Backends must
+    implement every abstract method; the hooks at the end default to no-ops.
+    """
+
+    @abc.abstractmethod
+    def __len__(self):
+        """Return the number of stored transactions."""
+
+    @abc.abstractmethod
+    def __iter__(self):
+        """Iterate over all transactions as dicts (in insertion order)."""
+
+    @abc.abstractmethod
+    def rows(self, row_ids):
+        """Yield transaction dicts for the given row ids, in the given order."""
+
+    @abc.abstractmethod
+    def append(self, transaction):
+        """Add one transaction dict."""
+
+    @abc.abstractmethod
+    def extend(self, transactions):
+        """Add several transaction dicts."""
+
+    @abc.abstractmethod
+    def totals(self):
+        """Return (income, expenses) summed over all transactions."""
+
+    @abc.abstractmethod
+    def category_totals(self, trans_type="Expense", year_month=None):
+        """Return {category: total} for one type, optionally within one month (YYYY-MM)."""
+
+    @abc.abstractmethod
+    def monthly_totals(self):
+        """Return (YYYY-MM, income, expenses) tuples in chronological order."""
+
+    @abc.abstractmethod
+    def page_ids(self, column, reverse=False, offset=0, limit=50):
+        """Return one page of row ids ordered by "date", "amount" or "type"."""
+
+    @abc.abstractmethod
+    def find_description(self, query, match_all=True):
+        """Return row ids whose description contains the query terms, best matches first."""
+
+    @abc.abstractmethod
+    def find_date_range(self, start_date, end_date):
+        """Return row ids with start_date <= date <= end_date (YYYY-MM-DD strings), oldest first."""
+
+    @abc.abstractmethod
+    def find_amount_range(self, min_amount, max_amount):
+        """Return row ids with min_amount <= amount <= max_amount, smallest first."""
+
+    @abc.abstractmethod
+    def find_category(self, category):
+        """Return row ids belonging to a category."""
+
+    @abc.abstractmethod
+    def balance_as_of(self, date):
+        """Return income minus expenses over all transactions up to and including date (YYYY-MM-DD)."""
+
+    @abc.abstractmethod
+    def balance_between(self, start_date, end_date):
+        """Return income minus expenses for start_date <= date <= end_date (YYYY-MM-DD strings)."""
+
+    def index_descriptions(self):
+        """Bring any description search index up to date."""
+
+    def commit(self):
+        """Make appended transactions durable, for backends that write as they go."""
+
+    def refresh(self):
+        """Pick up changes other processes made to a shared backend; return True if there were any."""
+        return False
+
+
+class TransactionStore(LedgerStore):
+    """
+    Column-oriented, in-memory storage for the finance tracker's transactions.
+
+    Instead of keeping one dict per transaction, every field lives in its own
+    typed array (one slot per row). Strings such as categories and descriptions
+    are dictionary-encoded: each distinct value is stored once and rows only
+    keep an integer code pointing at it.
+    """
+
+    def __init__(self, rates=None):
+        """
+        Create an empty store.
+
+        Args:
+            rates (RateTable): Exchange rates for converting amounts to the base
+                               currency (default: base currency only)
+        """
+        self.rates = rates or RateTable()
+
+        # Parallel typed columns, one entry per transaction
+        self.dates = array.array('i')  # Date as a proleptic Gregorian ordinal
+        self.amounts = array.array('q')  # Integer cents in the row's currency
+        self.base_amounts = array.array('q')  # Integer cents in the base currency
+        self.types = array.array('b')  # Index into TRANSACTION_TYPES
+        self.currency_codes = array.array('i')
+        self.category_codes = array.array('i')
+        self.description_codes = array.array('i')
+
+        # Dictionaries for the encoded string columns
+        self.currency_names = []
+        self._currency_lookup = {}
+        self.category_names = []
+        self._category_lookup = {}
+        self.description_names = []
+        self._description_lookup = {}
+
+        # Rollups kept up to date on every append. Each entry is a list of
+        # [expense total, income total, expense count, income count], indexed
+        # by type code (counts at type code + 2).
+        self.monthly_rollup = {}  # YYYY-MM -> entry
+        self.month_category_rollup = {}  # YYYY-MM -> {category code -> entry}
+        self.category_rollup = {}  # category code -> entry
+        self._type_totals = [0, 0]  # Running total per type code
+        self.balances = BalanceIndex()  # Net amount per day, for point-in-time balances
+
+        # Secondary indexes: keys kept in sorted order next to their row ids,
+        # plus a hash index from category code to the rows in that category
+        self._date_keys = array.array('i')
+        self._date_rows = array.array('i')
+        self._amount_keys = array.array('q')
+        self._amount_rows = array.array('i')
+        self._category_rows = {}
+        self._type_rows = [array.array('i') for _ in TRANSACTION_TYPES]  # type code -> row ids
+        self._description_rows = {}  # description code -> row ids
+        self.text_index = DescriptionIndex()
+
+    def __len__(self):
+        """Return the number of stored transactions."""
+        return len(self.dates)
+
+    def __iter__(self):
+        """Iterate over all transactions as dicts (in insertion order)."""
+        return self.rows(range(len(self)))
+
+    def __getitem__(self, row_id):
+        """Rebuild the transaction dict for a single row."""
+        return {
+            "date": datetime.date.fromordinal(self.dates[row_id]).isoformat(),
+            "description": self.description_names[self.description_codes[row_id]],
+            "amount": self.amounts[row_id],
+            "currency": self.currency_names[self.currency_codes[row_id]],
+            "type": TRANSACTION_TYPES[self.types[row_id]],
+            "category": self.category_names[self.category_codes[row_id]]
+        }
+
+    def rows(self, row_ids):
+        """
+        Yield transaction dicts for the given row ids.
+
+        Args:
+            row_ids (iterable): Row positions to materialise
+        """
+        for row_id in row_ids:
+            yield self[row_id]
+
+    @staticmethod
+    def _encode(value, names, lookup):
+        """Return the dictionary code for a string, adding it if it is new."""
+        code = lookup.get(value)
+        if code is None:
+            code = len(names)
+            names.append(value)
+            lookup[value] = code
+        return code
+
+    @staticmethod
+    def _roll(rollup, key, type_code, amount, count=1):
+        """Add an amount (the sum of count transactions) to the rollup entry stored under key."""
+        entry = rollup.get(key)
+        if entry is None:
+            entry = rollup[key] = [0, 0, 0, 0]
+        entry[type_code] += amount
+        entry[type_code + 2] += count
+
+    def category_code(self, category):
+        """Return the code of a category, or None if no row uses it."""
+        return self._category_lookup.get(category)
+
+    def append(self, transaction):
+        """
+        Add one transaction to the store.
+
+        Args:
+            transaction (dict): Transaction with date, description, amount (integer cents),
+                                type and category
+        """
+        row_id = self._append_row(transaction)
+        self._insert_sorted(self._date_keys, self._date_rows, self.dates[row_id], row_id)
+        self._insert_sorted(self._amount_keys, self._amount_rows, self.base_amounts[row_id], row_id)
+        self.text_index.update(self.description_names)
+
+    def extend(self, transactions):
+        """Add several transactions to the store, updating the sorted indexes once per batch."""
+        first_row = len(self)
+        for transaction in transactions:
+            self._append_row(transaction)
+        self._index_new_rows(first_row)
+
+    def extend_columns(self, batches):
+        """
+        Add transactions that are already in column form, such as a binary snapshot.
+
+        This skips parsing dates and building a dict per row: columns are
+        appended wholesale, and the rollups and balance index are updated once
+        per (day, type, category) group rather than once per row.
+
+        Args:
+            batches (list): Dicts with "dates" (ordinals), "amounts" (cents), "types"
+                            (type codes), "currency_codes", "category_codes" and
+                            "description_codes" arrays, plus the "currency_names",
+                            "category_names" and "description_names" lists the codes
+                            refer to
+        """
+        first_row = len(self)
+        for columns in batches:
+            self._append_columns(columns)
+        self._index_new_rows(first_row)
+
+    def _append_columns(self, columns):
+        """Append one batch of columns, updating the rollups and hash indexes."""
+        first_row = len(self)
+
+        # Translate the batch's own string codes into the store's codes
+        category_map = [self._encode(name, self.category_names, self._category_lookup)
+                        for name in columns["category_names"]]
+        description_map = [self._encode(name, self.description_names, self._description_lookup)
+                           for name in columns["description_names"]]
+        currency_map = [self._encode(name, self.currency_names, self._currency_lookup)
+                        for name in columns["currency_names"]]
+        category_codes = array.array('i', map(category_map.__getitem__, columns["category_codes"]))
+        description_codes = array.array('i', map(description_map.__getitem__, columns["description_codes"]))
+
+        # Convert the whole amount column to the base currency in one pass
+        base_amounts = self.rates.convert_column(columns["amounts"], columns["dates"],
+                                                 columns["currency_codes"], columns["currency_names"])
+
+        self.dates.extend(columns["dates"])
+        self.amounts.extend(columns["amounts"])
+        self.base_amounts.extend(base_amounts)
+        self.types.extend(columns["types"])
+        self.currency_codes.extend(array.array('i', map(currency_map.__getitem__, columns["currency_codes"])))
+        self.category_codes.extend(category_codes)
+        self.description_codes.extend(description_codes)
+
+        # Group amounts by (day, type, category) and fill the hash indexes in one pass
+        groups = {}
+        for row_id, key, amount, description_code in zip(
+                range(first_row, len(self)), zip(columns["dates"], columns["types"], category_codes),
+                base_amounts, description_codes):
+            group = groups.get(key)
+            if group is None:
+                group = groups[key] = [0, 0]
+            group[0] += amount
+            group[1] += 1
+
+            rows = self._category_rows.get(key[2])
+            if rows is None:
+                rows = self._category_rows[key[2]] = array.array('i')
+            rows.append(row_id)
+            self._type_rows[key[1]].append(row_id)
+
+            rows = self._description_rows.get(description_code)
+            if rows is None:
+                rows = self._description_rows[description_code] = array.array('i')
+            rows.append(row_id)
+
+        for (ordinal, type_code, category_code), (amount, count) in groups.items():
+            date = datetime.date.fromordinal(ordinal)
+            year_month = f"{date.year:04d}-{date.month:02d}"
+            self._roll(self.monthly_rollup, year_month, type_code, amount, count)
+            self._roll(self.month_category_rollup.setdefault(year_month, {}), category_code, type_code, amount, count)
+            self._roll(self.category_rollup, category_code, type_code, amount, count)
+            self._type_totals[type_code] += amount
+            self.balances.add(ordinal, amount if type_code == TYPE_CODES["Income"] else -amount)
+
+    def _index_new_rows(self, first_row):
+        """Add rows first_row onwards to the sorted indexes."""
+        if len(self) - first_row >= REINDEX_BATCH_SIZE:
+            self._merge_sorted_indexes(first_row)
+        else:
+            for row_id in range(first_row, len(self)):
+                self._insert_sorted(self._date_keys, self._date_rows, self.dates[row_id], row_id)
+                self._insert_sorted(self._amount_keys, self._amount_rows, self.base_amounts[row_id], row_id)
+
+    def _append_row(self, transaction):
+        """Append a transaction to the columns, rollups and category index; return its row id."""
+        row_id = len(self)
+        date = datetime.date.fromisoformat(transaction["date"])
+        currency = transaction.get("currency", BASE_CURRENCY)
+        amount = self.rates.convert(transaction["amount"], currency, date.toordinal())
+        type_code = TYPE_CODES[transaction["type"]]
+        if abs(transaction["amount"]) > MAX_CENTS or abs(amount) > MAX_CENTS:
+            raise ValueError(f"invalid amount {transaction['amount']}: too large")
+
+        # Work out every column value first, so a bad transaction can't leave a partial row
+        category_code = self._encode(transaction["category"], self.category_names, self._category_lookup)
+        currency_code = self._encode(currency, self.currency_names, self._currency_lookup)
+        description_code = self._encode(transaction["description"], self.description_names, self._description_lookup)
+
+        self.dates.append(date.toordinal())
+        self.amounts.append(transaction["amount"])
+        self.base_amounts.append(amount)
+        self.types.append(type_code)
+        self.currency_codes.append(currency_code)
+        self.category_codes.append(category_code)
+        self.description_codes.append(description_code)
+
+        # Update the rollups in O(1)
+        year_month = f"{date.year:04d}-{date.month:02d}"
+        self._roll(self.monthly_rollup, year_month, type_code, amount)
+        self._roll(self.month_category_rollup.setdefault(year_month, {}), category_code, type_code, amount)
+        self._roll(self.category_rollup, category_code, type_code, amount)
+        self._type_totals[type_code] += amount
+        self.balances.add(date.toordinal(), amount if type_code == TYPE_CODES["Income"] else -amount)
+
+        rows = self._category_rows.get(category_code)
+        if rows is None:
+            rows = self._category_rows[category_code] = array.array('i')
+        rows.append(row_id)
+        self._type_rows[type_code].append(row_id)
+
+        rows = self._description_rows.get(description_code)
+        if rows is None:
+            rows = self._description_rows[description_code] = array.array('i')
+        rows.append(row_id)
+        return row_id
+
+    @staticmethod
+    def _insert_sorted(keys, rows, key, row_id):
+        """Insert a row into a sorted index, after any rows with an equal key."""
+        position = bisect.bisect_right(keys, key)
+        keys.insert(position, key)
+        rows.insert(position, row_id)
+
+    def _merge_sorted_indexes(self, first_row):
+        """Add rows first_row onwards to the date and amount indexes with one sort each."""
+        new_rows = range(first_row, len(self))
+
+        # The existing index and the sorted new rows form two ordered runs,
+        # which sorted() merges in linear time
+        date_order = self._date_rows.tolist() + sorted(new_rows, key=self.dates.__getitem__)
+        date_order.sort(key=self.dates.__getitem__)
+        self._date_rows = array.array('i', date_order)
+        self._date_keys = array.array('i', map(self.dates.__getitem__, date_order))
+
+        amount_order = self._amount_rows.tolist() + sorted(new_rows, key=self.base_amounts.__getitem__)
+        amount_order.sort(key=self.base_amounts.__getitem__)
+        self._amount_rows = array.array('i', amount_order)
+        self._amount_keys = array.array('q', map(self.base_amounts.__getitem__, amount_order))
+
+    def totals(self):
+        """Return (income, expenses) summed over all transactions."""
+        return self._type_totals[TYPE_CODES["Income"]], self._type_totals[TYPE_CODES["Expense"]]
+
+    def category_totals(self, trans_type="Expense", year_month=None):
+        """
+        Return totals of one transaction type per category, read from the rollups.
+
+        Args:
+            trans_type (str): "Income" or "Expense"
+            year_month (str): Restrict to one month (YYYY-MM), or None for all time
+
+        Returns:
+            dict: Category name -> total amount, only for categories that occur
+        """
+        wanted = TRANSACTION_TYPES.index(trans_type)
+        if year_month is None:
+            rollup = self.category_rollup
+        else:
+            rollup = self.month_category_rollup.get(year_month, {})
+        return {self.category_names[code]: entry[wanted]
+                for code, entry in rollup.items() if entry[wanted + 2]}
+
+    def monthly_totals(self):
+        """
+        Return income and expenses per month, read from the monthly rollup.
+
+        Returns:
+            list: (YYYY-MM, income, expenses) tuples in chronological order
+        """
+        income_code = TRANSACTION_TYPES.index("Income")
+        return [(year_month, entry[income_code], entry[1 - income_code])
+                for year_month, entry in sorted(self.monthly_rollup.items())]
+
+    def page_ids(self, column, reverse=False, offset=0, limit=50):
+        """
+        Return one page of row ids in sort order, without sorting the whole ledger.
+
+        Args:
+            column (str): "date", "amount" or "type"
+            reverse (bool): Sort in descending order
+            offset (int): Number of rows to skip
+            limit (int): Maximum number of row ids to return
+
+        Raises:
+            ValueError: If column is not one of the above
+        """
+        if column not in ("date", "amount", "type"):
+            raise ValueError(f"cannot sort by '{column}'")
+        count = len(self)
+        end = min(offset + limit, count)
+        if offset >= end:
+            return []
+
+        # Dates and amounts are already ordered by their indexes, so a page is a slice
+        if column == "date":
+            order = self._date_rows
+        elif column == "amount":
+            order = self._amount_rows
+        else:
+            # Each type's rows are kept in row order, so a page is a slice across the types in turn
+            page = []
+            start, stop = offset, end
+            for rows in (self._type_rows[::-1] if reverse else self._type_rows):
+                page.extend(rows[start:stop].tolist())
+                start = max(0, start - len(rows))
+                stop -= len(rows)
+                if stop <= 0:
+                    break
+            return page
+
+        if reverse:
+            return order[count - end:count - offset][::-1].tolist()
+        return order[offset:end].tolist()
+
+    def index_descriptions(self):
+        """Bring the description index up to date with the stored descriptions."""
+        self.text_index.update(self.description_names)
+
+    def find_description(self, query, match_all=True):
+        """
+        Return row ids whose description contains the query terms (case-insensitive).
+
+        Args:
+            query (str): One or more space-separated search terms
+            match_all (bool): Require every term (AND) rather than any term (OR)
+
+        Returns:
+            list: Row ids, rows with better-matching descriptions first
+        """
+        self.index_descriptions()
+        results = []
+        for code in self.text_index.search(query, self.description_names, match_all):
+            results.extend(self._description_rows[code])
+        return results
+
+    @staticmethod
+    def _range(keys, rows, low, high):
+        """Return the row ids whose key lies in [low, high], using binary search."""
+        start = bisect.bisect_left(keys, low)
+        end = bisect.bisect_right(keys, high)
+        return rows[start:end].tolist()
+
+    def find_date_range(self, start_date, end_date):
+        """Return row ids with start_date <= date <= end_date (YYYY-MM-DD strings), oldest first."""
+        start = datetime.date.fromisoformat(start_date).toordinal()
+        end = datetime.date.fromisoformat(end_date).toordinal()
+        return self._range(self._date_keys, self._date_rows, start, end)
+
+    def find_amount_range(self, min_amount, max_amount):
+        """Return row ids with min_amount <= amount <= max_amount, smallest first."""
+        return self._range(self._amount_keys, self._amount_rows, min_amount, max_amount)
+
+    def find_category(self, category):
+        """Return row ids belonging to a category."""
+        code = self.category_code(category)
+        if code is None:
+            return []
+        return self._category_rows[code].tolist()
+
+    def balance_as_of(self, date):
+        """Return income minus expenses over all transactions up to and including date (YYYY-MM-DD)."""
+        return self.balances.balance_through(datetime.date.fromisoformat(date).toordinal())
+
+    def balance_between(self, start_date, end_date):
+        """Return income minus expenses for start_date <= date <= end_date (YYYY-MM-DD strings)."""
+        start = datetime.date.fromisoformat(start_date).toordinal()
+        end = datetime.date.fromisoformat(end_date).toordinal()
+        if end < start:
+            return 0
+        return self.balances.balance_through(end) - self.balances.balance_through(start - 1)
@@ -0,0 +1,195 @@
+import random
+import time
+
+from hangman_words import get_word_store
+
+# Scoring rules; pass a modified copy to HangmanEngine to try other values
+SCORING = {
+    "correct_guess": 10,  # Points per correct guess, times the difficulty multiplier
+    "win_bonus": 50,  # Points for winning, times the multiplier and (remaining attempts + 1)
+    "time_bonus_seconds": 300,  # A win earns a point for each second left of this
+    "hint_penalty": 25,  # Points taken off for each hint, both when used and again on winning
+}
+DIFFICULTY_MULTIPLIER = {"easy": 1, "medium": 2, "hard": 3}
+
+# Results of HangmanEngine.guess()
+INVALID = "invalid"  # Not a single letter
+REPEATED = "repeated"  # Letter already guessed
+HIT = "hit"
+MISS = "miss"
+
+# Bit for each letter in the guessed and unrevealed masks; letters outside a-z get the next free bit
+LETTER_BITS = {letter: 1 << i for i, letter in enumerate("abcdefghijklmnopqrstuvwxyz")}
+
+
+def letter_bit(letter):
+    """Return the mask bit for a letter."""
+    bit = LETTER_BITS.get(letter)
+    if bit is None:
+        bit = LETTER_BITS[letter] = 1 << len(LETTER_BITS)
+    return bit
+
+
+class HangmanEngine:
+    """
+    The rules of Hangman, without any input, output or pauses.
+
+    Holds one game's state and applies guesses and hints to it. Time is read
+    from an injectable clock, so games can be driven by code (see
+    hangman_sim) as well as by the interactive HangmanGame built on top.
+    """
+
+    def __init__(self, clock=time.time, scoring=None):
+        """
+        Create an engine with no game in progress.
+
+        Args:
+            clock (callable): Returns the current time in seconds
+            scoring (dict): Scoring rules (default SCORING)
+        """
+        self.clock = clock
+        self.scoring = scoring or SCORING
+        self.word_store = get_word_store()  # Shared by every game in the process
+        self.max_incorrect_guesses = 6  # Number of attempts before game over
+        self.current_incorrect_guesses = 0  # Current number of incorrect guesses
+        self.guessed_mask = 0  # Bit (see letter_bit) set for each letter already guessed
+        self.word_to_guess = ""  # The word player needs to guess
+        self.word_display = []  # Word display with revealed letters and underscores
+        self.letter_positions = {}  # Letter -> positions of that letter in word_to_guess
+        self.unrevealed_mask = 0  # Bit set for each letter of the word not yet revealed
+        self.game_over = False  # Flag to track if the game is over
+        self.game_won = False  # Flag to track if the player won
+        self.score = 0  # Player's score for the current game
+        self.difficulty = "medium"  # Default difficulty level
+        self.category = "random"  # Default word category
+        self.game_start_time = None  # Track when the game started
+        self.game_end_time = None  # Track when the game ended
+        self.hints_used = 0  # Track how many hints were used
+        self.win_bonus = 0  # Points the last win earned for difficulty and attempts left
+        self.time_bonus = 0  # Points the last win earned for speed
+
+    def new_game(self, word=None):
+        """Reset the game state and start a game, with a random word unless one is given."""
+        self.current_incorrect_guesses = 0
+        self.guessed_mask = 0
+        self.game_over = False
+        self.game_won = False
+        self.score = 0
+        self.hints_used = 0
+        self.win_bonus = 0
+        self.time_bonus = 0
+        self.game_end_time = None
+
+        self.word_to_guess = word or self.choose_random_word()
+        self.initialize_word_display()
+        self.game_start_time = self.clock()
+
+    def choose_random_word(self):
+        """Choose a random word based on the current category and difficulty."""
+        # A 'random' category picks a category first, then a word from its list
+        return self.word_store.random_word(self.category, self.difficulty)
+
+    def initialize_word_display(self):
+        """Initialize the word display with underscores for each letter, and index the word's letters."""
+        # Spaces and hyphens can't be guessed, so they are shown from the start
+        self.word_display = ["_" if char.isalpha() else char for char in self.word_to_guess]
+        self.letter_positions = {}
+        self.unrevealed_mask = 0
+        for i, char in enumerate(self.word_to_guess):
+            if char.isalpha():
+                self.letter_positions.setdefault(char, []).append(i)
+                self.unrevealed_mask |= letter_bit(char)
+
+    @property
+    def guessed_letters(self):
+        """Letters already guessed, in alphabetical order."""
+        return sorted(letter for letter, bit in LETTER_BITS.items() if self.guessed_mask & bit)
+
+    def update_word_display(self, letter):
+        """Update the word display with the correctly guessed letter."""
+        for i in self.letter_positions.get(letter, ()):
+            self.word_display[i] = letter
+        self.unrevealed_mask &= ~letter_bit(letter)
+
+    def is_word_guessed(self):
+        """Check if the word has been completely guessed."""
+        return not self.unrevealed_mask
+
+    def guess(self, guess):
+        """
+        Apply a guess to the game.
+
+        Args:
+            guess (str): The player's input
+
+        Returns:
+            str: INVALID, REPEATED, HIT or MISS
+        """
+        # Check if the guess is a single letter
+        if len(guess) != 1 or not guess.isalpha():
+            return INVALID
+        guess = guess.lower()
+
+        # Check if the letter has already been guessed
+        bit = letter_bit(guess)
+        if self.guessed_mask & bit:
+            return REPEATED
+        self.guessed_mask |= bit
+
+        if self.unrevealed_mask & bit:
+            self.update_word_display(guess)
+            # Score for a correct guess depends on the difficulty
+            self.score += self.scoring["correct_guess"] * DIFFICULTY_MULTIPLIER[self.difficulty]
+            result = HIT
+        else:
+            self.current_incorrect_guesses += 1
+            result = MISS
+
+        self.check_game_over()
+        return result
+
+    def hint(self):
+        """
+        Reveal a hidden letter at the cost of score reduction.
+
+        Returns:
+            str: The letter revealed, or None if the word is already guessed
+        """
+        if not self.unrevealed_mask:
+            return None
+
+        # Choose a random hidden letter to reveal, weighted by how often it appears
+        hidden_letters = [letter for letter, positions in self.letter_positions.items()
+                          if self.unrevealed_mask & letter_bit(letter) for _ in positions]
+        hint_letter = random.choice(hidden_letters)
+
+        # Update the display and guessed letters
+        self.guessed_mask |= letter_bit(hint_letter)
+        self.update_word_display(hint_letter)
+
+        # Increment hints used counter and reduce score, but not below 0
+        self.hints_used += 1
+        self.score = max(0, self.score - self.scoring["hint_penalty"])
+
+        self.check_game_over()
+        return hint_letter
+
+    def check_game_over(self):
+        """End the game if the word is guessed or the attempts have run out, scoring a win."""
+        if self.is_word_guessed():
+            self.game_won = True
+            self.game_over = True
+            self.game_end_time = self.clock()
+            # Bonus points for winning based on difficulty, remaining attempts and time taken
+            multiplier = DIFFICULTY_MULTIPLIER[self.difficulty]
+            remaining_attempts = self.max_incorrect_guesses - self.current_incorrect_guesses
+            self.time_bonus = max(0, int(self.scoring["time_bonus_seconds"]
+                                         - (self.game_end_time - self.game_start_time)))
+            self.win_bonus = self.scoring["win_bonus"] * multiplier * (remaining_attempts + 1)
+            self.score += self.win_bonus + self.time_bonus
+            # Penalty for using hints
+            self.score -= self.hints_used * self.scoring["hint_penalty"]
+            self.score = max(0, self.score)  # Ensure score doesn't go negative
+        elif self.current_incorrect_guesses >= self.max_incorrect_guesses:
+            self.game_over = True
+            self.game_end_time = self.clock()
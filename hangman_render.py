@@ -0,0 +1,127 @@
+import os
+import shutil
+import sys
+import unicodedata
+
+CSI = b"\x1b["  # Start of an ANSI control sequence
+
+# Rows printed below a frame before the next one, at most: the game menu (a blank line,
+# "Options:" and three choices), a blank line and the choice prompt, the letter prompt
+# and the guess result
+PROMPT_ROWS = 9
+
+
+def enable_ansi():
+    """Return True if the console understands ANSI control sequences, turning them on in Windows consoles."""
+    if os.name != "nt":
+        return True
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # Standard output
+        mode = ctypes.c_uint32()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    except (AttributeError, OSError):
+        return False
+
+
+def display_width(text):
+    """Return the number of terminal columns text takes up (wide characters count twice)."""
+    return sum(0 if unicodedata.combining(char) else 2 if unicodedata.east_asian_width(char) in "WF" else 1
+               for char in text)
+
+
+class TerminalRenderer:
+    """
+    Draws full-screen frames, rewriting only the lines that changed.
+
+    The lines of the frame on screen are kept; the next frame moves the
+    cursor to each changed line, rewrites it and clears what is left of
+    it, then clears everything below the frame (the prompts printed after
+    the last one). When the frame and its prompts don't fit the terminal,
+    the prompts scroll the screen, so the next frame is instead rewritten
+    line by line from the top; the screen is never blanked either way.
+    Lines that wrap are counted by the rows they take up. Each frame is
+    sent as one write of pre-encoded bytes, and no process is started.
+    When output is not a terminal, frames are simply printed one after
+    another.
+    """
+
+    def __init__(self, out=None):
+        """
+        Create a renderer.
+
+        Args:
+            out: Text stream to draw on (default sys.stdout)
+        """
+        self.out = out or sys.stdout
+        self.encoding = getattr(self.out, "encoding", None) or "utf-8"
+        self.ansi = self.out.isatty() and enable_ansi()
+        self.previous = None  # Lines of the frame on screen, or None if the screen is unknown
+        self.previous_heights = None  # Rows each of those lines takes up
+
+    def encode(self, text):
+        """Split text into encoded lines, so text drawn in many frames is encoded once."""
+        return tuple(line.encode(self.encoding, "replace") for line in text.split("\n"))
+
+    def clear(self):
+        """Clear the screen and forget the frame on it."""
+        self.previous = None
+        if self.ansi:
+            self.write(CSI + b"2J" + CSI + b"H")
+
+    def draw(self, lines):
+        """
+        Show a frame, replacing the one on screen.
+
+        Args:
+            lines (list): Encoded lines of the frame, from the top of the screen
+        """
+        if not self.ansi:
+            self.write(b"\n".join(lines) + b"\n")
+            return
+
+        size = shutil.get_terminal_size()
+        widths = [display_width(line.decode(self.encoding, "replace")) for line in lines]
+        heights = [max(1, -(-width // size.columns)) for width in widths]
+
+        parts = []
+        if self.previous is None or heights != self.previous_heights:
+            # Rewrite every line from the top, over whatever is there
+            parts.append(CSI + b"H")
+            for line, width in zip(lines, widths):
+                parts.append(line + self._erase_tail(width, size.columns) + b"\n")
+        else:
+            row = 1
+            for index, (line, width, height) in enumerate(zip(lines, widths, heights)):
+                if index >= len(self.previous) or self.previous[index] != line:
+                    parts.append(b"%s%d;1H%s%s" % (CSI, row, line, self._erase_tail(width, size.columns)))
+                row += height
+            parts.append(b"%s%d;1H" % (CSI, row))
+        parts.append(CSI + b"J")
+
+        # A frame that, with its prompts and the row the cursor ends on, would scroll the
+        # screen can't be updated in place next time
+        fits = sum(heights) + PROMPT_ROWS + 1 <= size.lines
+        self.previous = lines if fits else None
+        self.previous_heights = heights
+        self.write(b"".join(parts))
+
+    @staticmethod
+    def _erase_tail(width, columns):
+        """Return the sequence clearing the rest of a line's last row, unless the line fills it."""
+        # With the cursor parked past a full row, erasing would remove the row's last character
+        return b"" if width and width % columns == 0 else CSI + b"K"
+
+    def write(self, data):
+        """Write bytes in one go, after any text already printed."""
+        self.out.flush()
+        buffer = getattr(self.out, "buffer", None)
+        if buffer is None:
+            self.out.write(data.decode(self.encoding))
+            self.out.flush()
+        else:
+            buffer.write(data)
+            buffer.flush()
@@ -0,0 +1,317 @@
+import argparse
+import collections
+import concurrent.futures
+import json
+import os
+import random
+import sys
+
+from hangman_engine import DIFFICULTY_MULTIPLIER, SCORING, HangmanEngine
+from hangman_solver import get_solver
+from hangman_words import get_word_store
+
+DEFAULT_GAMES = 10000
+DEFAULT_SEED = 42
+DEFAULT_THINK_TIME = 4.0  # Average seconds a simulated player takes over each move
+CHUNK_GAMES = 500  # Games per task handed to a worker process
+SCORE_BUCKET = 100  # Width of the bars in the printed score histogram
+LETTER_FREQUENCY = "etaoinsrhldcumfpgwybvkxjqz"  # Letters of English text, most common first
+
+
+class SimulatedClock:
+    """A clock that only moves when told to, so games run faster than real time."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        """Move the clock forward."""
+        self.now += seconds
+
+
+class RandomStrategy:
+    """Guesses letters in a random order."""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.order = []
+
+    def start(self, engine):
+        """Prepare for a new game."""
+        self.order = list(LETTER_FREQUENCY)
+        self.rng.shuffle(self.order)
+
+    def next_letter(self, engine):
+        """Return the letter to guess next."""
+        return self.order.pop()
+
+
+class FrequencyStrategy:
+    """Guesses letters from the most to the least common in English."""
+
+    def __init__(self, rng):
+        self.position = 0
+
+    def start(self, engine):
+        """Prepare for a new game."""
+        self.position = 0
+
+    def next_letter(self, engine):
+        """Return the letter to guess next."""
+        self.position += 1
+        return LETTER_FREQUENCY[self.position - 1]
+
+
+class SolverStrategy:
+    """Guesses the letter hangman_solver expects to leave the fewest candidate words."""
+
+    def __init__(self, rng):
+        self.state = None
+        self.seen_mask = 0  # Guessed letters already passed on to the solver
+
+    def start(self, engine):
+        """Prepare for a new game."""
+        self.state = get_solver(engine.category, engine.difficulty).state(engine.word_display)
+        self.seen_mask = 0
+
+    def next_letter(self, engine):
+        """Return the letter to guess next."""
+        # Narrow the candidates with what the last guesses (and hints) revealed
+        if engine.guessed_mask != self.seen_mask:
+            for letter in engine.guessed_letters:
+                if letter not in self.state.guessed:
+                    positions = [i for i, char in enumerate(engine.word_display) if char == letter]
+                    self.state.guess(letter, positions)
+            self.seen_mask = engine.guessed_mask
+
+        letter = self.state.best_letter()
+        if letter is None:
+            # No candidate word fits; fall back to the next common letter not yet tried
+            letter = next(char for char in LETTER_FREQUENCY if char not in self.state.guessed)
+        return letter
+
+
+STRATEGIES = {"random": RandomStrategy, "frequency": FrequencyStrategy, "solver": SolverStrategy}
+
+
+def play_game(engine, strategy, clock, rng, think_time, max_hints):
+    """
+    Play one game with a strategy.
+
+    Args:
+        engine (HangmanEngine): Engine whose category and difficulty are set
+        strategy: One of the STRATEGIES
+        clock (SimulatedClock): The engine's clock
+        rng (random.Random): Source of thinking times
+        think_time (float): Average seconds per move (0 for instant play)
+        max_hints (int): Hints the player takes, one at a time, when down to its last attempt
+    """
+    engine.new_game()
+    strategy.start(engine)
+    while not engine.game_over:
+        if think_time:
+            clock.advance(rng.expovariate(1 / think_time))
+        remaining = engine.max_incorrect_guesses - engine.current_incorrect_guesses
+        if remaining == 1 and engine.hints_used < max_hints:
+            engine.hint()
+        else:
+            engine.guess(strategy.next_letter(engine))
+
+
+def simulate_games(games, strategy_name, difficulty, category, seed, think_time, max_hints, scoring):
+    """
+    Play a batch of games in this process; meant to run in a worker.
+
+    Returns:
+        dict: Game and win counts, and Counters of scores, bonuses and misses
+    """
+    random.seed(seed)  # Word choice and hints use the random module
+    rng = random.Random(seed)
+    clock = SimulatedClock()
+    engine = HangmanEngine(clock, scoring)
+    engine.difficulty = difficulty
+    engine.category = category
+    strategy = STRATEGIES[strategy_name](rng)
+
+    result = {"games": games, "wins": 0, "hints": 0, "score": collections.Counter(),
+              "win_bonus": collections.Counter(), "time_bonus": collections.Counter(),
+              "misses": collections.Counter()}
+    for _ in range(games):
+        play_game(engine, strategy, clock, rng, think_time, max_hints)
+        result["wins"] += engine.game_won
+        result["hints"] += engine.hints_used
+        result["score"][engine.score] += 1
+        result["misses"][engine.current_incorrect_guesses] += 1
+        if engine.game_won:
+            result["win_bonus"][engine.win_bonus] += 1
+            result["time_bonus"][engine.time_bonus] += 1
+    return result
+
+
+def run_simulation(games, strategy_name, difficulty, category="random", seed=DEFAULT_SEED,
+                   think_time=DEFAULT_THINK_TIME, max_hints=0, scoring=None, workers=None):
+    """
+    Play games across a pool of worker processes and combine their results.
+
+    Games are split into chunks of CHUNK_GAMES, each with its own seed, so
+    the results for a given seed are the same however many workers run.
+
+    Args:
+        workers (int): Worker processes (default: one per CPU; 1 plays in this process)
+
+    Returns:
+        dict: Combined results, as returned by simulate_games
+
+    Raises:
+        ValueError: If games is less than 1
+    """
+    if games < 1:
+        raise ValueError("games must be at least 1")
+    scoring = scoring or SCORING
+    chunks = [(min(CHUNK_GAMES, games - start), strategy_name, difficulty, category, seed + start,
+               think_time, max_hints, scoring) for start in range(0, games, CHUNK_GAMES)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [simulate_games(*chunk) for chunk in chunks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(simulate_games, *zip(*chunks)))
+
+    combined = {"games": 0, "wins": 0, "hints": 0, "score": collections.Counter(),
+                "win_bonus": collections.Counter(), "time_bonus": collections.Counter(),
+                "misses": collections.Counter()}
+    for result in results:
+        for key, value in result.items():
+            combined[key] += value
+    return combined
+
+
+def counter_mean(counter):
+    """Return the mean of the values counted in a Counter (0 if empty)."""
+    total = sum(counter.values())
+    return sum(value * count for value, count in counter.items()) / total if total else 0
+
+
+def counter_quantile(counter, q):
+    """Return the q-th quantile (0 <= q <= 1) of the values counted in a Counter."""
+    rank = q * (sum(counter.values()) - 1)
+    seen = 0
+    for value in sorted(counter):
+        seen += counter[value]
+        if seen > rank:
+            return value
+    return None
+
+
+def summarize(result):
+    """Return the headline figures of a simulation result."""
+    wins = result["wins"]
+    mean_score = counter_mean(result["score"])
+    return {
+        "games": result["games"],
+        "win_rate": wins / result["games"],
+        "score_mean": mean_score,
+        "score_p10": counter_quantile(result["score"], 0.1),
+        "score_median": counter_quantile(result["score"], 0.5),
+        "score_p90": counter_quantile(result["score"], 0.9),
+        "score_max": max(result["score"]),
+        "misses_mean": counter_mean(result["misses"]),
+        "hints_per_game": result["hints"] / result["games"],
+        "win_bonus_mean": counter_mean(result["win_bonus"]),
+        "time_bonus_mean": counter_mean(result["time_bonus"]),
+        # Share of all points scored that came from the time bonus
+        "time_bonus_share": (counter_mean(result["time_bonus"]) * wins / (mean_score * result["games"])
+                             if mean_score else 0),
+    }
+
+
+def print_summary(difficulty, result):
+    """Print the headline figures and a histogram of scores."""
+    summary = summarize(result)
+    print(f"\n{difficulty.capitalize()} ({summary['games']} games, multiplier {DIFFICULTY_MULTIPLIER[difficulty]})")
+    print(f"  Win rate: {summary['win_rate']:.1%}   Misses per game: {summary['misses_mean']:.2f}   "
+          f"Hints per game: {summary['hints_per_game']:.2f}")
+    print(f"  Score: mean {summary['score_mean']:.1f}, p10 {summary['score_p10']}, "
+          f"median {summary['score_median']}, p90 {summary['score_p90']}, max {summary['score_max']}")
+    print(f"  Wins earn on average {summary['win_bonus_mean']:.1f} win bonus and "
+          f"{summary['time_bonus_mean']:.1f} time bonus ({summary['time_bonus_share']:.1%} of all points)")
+
+    buckets = collections.Counter()
+    for score, count in result["score"].items():
+        buckets[score // SCORE_BUCKET * SCORE_BUCKET] += count
+    largest = max(buckets.values())
+    for bucket in sorted(buckets):
+        bar = "#" * max(1, round(40 * buckets[bucket] / largest))
+        print(f"  {bucket:>5}-{bucket + SCORE_BUCKET - 1:<5} {buckets[bucket]:>8} {bar}")
+
+
+def parse_scoring(settings):
+    """Return SCORING with NAME=VALUE overrides applied, or raise ValueError."""
+    scoring = dict(SCORING)
+    for setting in settings:
+        name, _, value = setting.partition("=")
+        if name not in scoring:
+            raise ValueError(f"unknown scoring rule '{name}' (expected one of {', '.join(SCORING)})")
+        scoring[name] = int(value)
+    return scoring
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate Hangman games to calibrate the scoring rules.")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES, help="games per difficulty")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="solver")
+    parser.add_argument("--difficulty", choices=["easy", "medium", "hard", "all"], default="all")
+    parser.add_argument("--category", default="random")
+    parser.add_argument("--think-time", type=float, default=DEFAULT_THINK_TIME,
+                        help="average seconds per move, which drives the time bonus")
+    parser.add_argument("--hints", type=int, default=0, help="hints a player takes when down to its last attempt")
+    parser.add_argument("--set", dest="scoring", action="append", default=[], metavar="RULE=POINTS",
+                        help=f"override a scoring rule ({', '.join(SCORING)})")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="JSON file to write the summaries to")
+    args = parser.parse_args()
+
+    try:
+        scoring = parse_scoring(args.scoring)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+
+    word_store = get_word_store()
+    if args.category != "random" and args.category not in word_store.categories():
+        parser.error(f"unknown category '{args.category}' (expected random or one of "
+                     f"{', '.join(word_store.categories())})")
+
+    # Only simulate difficulties the category has words for
+    difficulties = ["easy", "medium", "hard"] if args.difficulty == "all" else [args.difficulty]
+    available = [difficulty for difficulty in difficulties
+                 if (word_store.by_difficulty[difficulty] if args.category == "random"
+                     else (args.category, difficulty) in word_store.paths)]
+    if not available:
+        parser.error(f"no {' or '.join(difficulties)} words for category '{args.category}'")
+    for difficulty in difficulties:
+        if difficulty not in available:
+            print(f"Skipping {difficulty}: no words for category '{args.category}'.", file=sys.stderr)
+    difficulties = available
+    summaries = {}
+    for difficulty in difficulties:
+        print(f"Simulating {args.games} {difficulty} games...", file=sys.stderr)
+        result = run_simulation(args.games, args.strategy, difficulty, args.category, args.seed,
+                                args.think_time, args.hints, scoring, args.workers)
+        print_summary(difficulty, result)
+        summaries[difficulty] = summarize(result)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"strategy": args.strategy, "scoring": scoring, "think_time": args.think_time,
+                       "hints": args.hints, "seed": args.seed, "summaries": summaries}, file, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import collections
+
+from hangman_words import get_word_store
+
+DECISION_CACHE_SIZE = 4096  # Best-letter decisions kept, so repeated game states are answered at once
+COMPACT_RATIO = 8  # Re-index the candidates once they are this many times fewer than the indexed words
+
+
+def bit_indices(bits):
+    """Return the positions of the set bits of a non-negative int, lowest first."""
+    text = bin(bits)[:1:-1]  # Lowest bit first
+    indices = []
+    index = text.find("1")
+    while index != -1:
+        indices.append(index)
+        index = text.find("1", index + 1)
+    return indices
+
+
+class LetterIndex:
+    """
+    Letter-occurrence bitsets over a list of words of one length.
+
+    Bit i of every bitset stands for words[i]: contains[letter] has the
+    words containing the letter anywhere, and at[position][letter] the
+    words with that letter at that position. Filtering and splitting a
+    candidate set are then a few big-int AND operations rather than loops
+    over strings.
+    """
+
+    def __init__(self, words):
+        """Index a list of words that all have the same length."""
+        self.words = words
+        self.all = (1 << len(words)) - 1
+        length = len(words[0]) if words else 0
+        size = (len(words) + 7) // 8
+
+        # Set bits in byte arrays first; building the ints bit by bit would be quadratic
+        at = [collections.defaultdict(lambda: bytearray(size)) for _ in range(length)]
+        for i, word in enumerate(words):
+            byte, bit = i >> 3, 1 << (i & 7)
+            for position, letter in enumerate(word):
+                at[position][letter][byte] |= bit
+        self.at = [{letter: int.from_bytes(bits, "little") for letter, bits in position.items()}
+                   for position in at]
+
+        self.contains = {}
+        for position in self.at:
+            for letter, bits in position.items():
+                self.contains[letter] = self.contains.get(letter, 0) | bits
+
+    def subset(self, bits):
+        """Return a new index over only the words whose bits are set."""
+        return LetterIndex([self.words[i] for i in bit_indices(bits)])
+
+
+class SolverState:
+    """
+    The candidate words of one game, narrowed as guesses are answered.
+
+    Create one with HangmanSolver.state(). After each guess, pass the
+    letter and the positions it was revealed at to guess(); best_letter()
+    then suggests the next one.
+    """
+
+    def __init__(self, solver, index, candidates, pattern, guessed):
+        self.solver = solver
+        self.index = index
+        self.candidates = candidates  # Bitset over index.words
+        self.pattern = pattern  # List of revealed characters, "_" where hidden
+        self.guessed = guessed  # Set of guessed letters
+
+    def count(self):
+        """Return the number of candidate words left."""
+        return self.candidates.bit_count()
+
+    def words(self):
+        """Return the candidate words."""
+        return [self.index.words[i] for i in bit_indices(self.candidates)]
+
+    def guess(self, letter, positions):
+        """
+        Narrow the candidates with the answer to a guess.
+
+        Args:
+            letter (str): The letter guessed
+            positions (list): Positions the letter was revealed at (empty for a miss)
+        """
+        self.guessed.add(letter)
+        at = self.index.at
+        if not positions:
+            self.candidates &= ~self.index.contains.get(letter, 0)
+        else:
+            # The letter is at exactly these positions, and at none of the hidden ones
+            for position in positions:
+                self.candidates &= at[position].get(letter, 0)
+                self.pattern[position] = letter
+            for position, char in enumerate(self.pattern):
+                if char == "_":
+                    self.candidates &= ~at[position].get(letter, 0)
+
+        # Work on narrower bitsets once most of the indexed words are ruled out
+        if self.candidates and self.candidates.bit_count() * COMPACT_RATIO < len(self.index.words):
+            self.index = self.index.subset(self.candidates)
+            self.candidates = self.index.all
+
+    def best_letter(self):
+        """
+        Return the unguessed letter that leaves the fewest candidates on average.
+
+        Guessing a letter splits the candidates by where the letter occurs
+        (nowhere being one outcome). The expected number left is the sum of
+        the squared outcome sizes divided by the candidate count, so the
+        letter with the smallest sum of squares is chosen; ties go to the
+        letter more candidates contain.
+
+        Returns:
+            str: The letter, or None if no candidate has an unguessed letter
+        """
+        key = ("".join(self.pattern), "".join(sorted(self.guessed)))
+        cached = self.solver.decisions.get(key)
+        if cached is not None:
+            self.solver.decisions.move_to_end(key)
+            return cached[0]
+
+        candidates = self.candidates
+        total = candidates.bit_count()
+        hidden = [self.index.at[position] for position, char in enumerate(self.pattern) if char == "_"]
+        best = None
+        best_score = None
+        for letter, letter_bits in self.index.contains.items():
+            if letter in self.guessed or not letter.isalpha():
+                continue
+            present = candidates & letter_bits
+            present_count = present.bit_count()
+            if not present_count:
+                continue
+
+            # Split the words containing the letter by each hidden position in turn
+            groups = [present]
+            for position in hidden:
+                at_position = position.get(letter, 0)
+                if not at_position:
+                    continue
+                split = []
+                for group in groups:
+                    with_letter = group & at_position
+                    if with_letter:
+                        split.append(with_letter)
+                        if with_letter != group:
+                            split.append(group & ~at_position)
+                    else:
+                        split.append(group)
+                groups = split
+
+            absent = total - present_count
+            score = (absent * absent + sum(group.bit_count() ** 2 for group in groups), -present_count)
+            if best_score is None or score < best_score:
+                best, best_score = letter, score
+
+        self.solver.decisions[key] = (best,)
+        if len(self.solver.decisions) > DECISION_CACHE_SIZE:
+            self.solver.decisions.popitem(last=False)
+        return best
+
+
+class HangmanSolver:
+    """
+    Hangman solver over a word list.
+
+    Words are grouped by length, and each group is indexed (see
+    LetterIndex) the first time a word of that length is played. Decisions
+    are cached, so game states that recur across games, such as the
+    opening, are answered without recomputing.
+    """
+
+    def __init__(self, words):
+        """Create a solver for an iterable of words (lowercase)."""
+        self.by_length = {}  # length -> list of words
+        for word in words:
+            self.by_length.setdefault(len(word), []).append(word)
+        self.indexes = {}  # length -> LetterIndex
+        self.decisions = collections.OrderedDict()  # (pattern, guessed letters) -> (letter,)
+
+    def state(self, word_display, guessed_letters=()):
+        """
+        Return the candidates for a game in progress.
+
+        Args:
+            word_display (list): The displayed word, "_" for each hidden letter
+            guessed_letters (iterable): Letters already guessed
+
+        Returns:
+            SolverState: Candidates matching the revealed letters and misses
+        """
+        length = len(word_display)
+        index = self.indexes.get(length)
+        if index is None:
+            index = self.indexes[length] = LetterIndex(self.by_length.get(length, []))
+
+        candidates = index.all
+        revealed = set()
+        for position, char in enumerate(word_display):
+            if char != "_":
+                candidates &= index.at[position].get(char, 0)
+                revealed.add(char)
+        for letter in set(guessed_letters):
+            if letter in revealed:
+                # A revealed letter can't also be behind a hidden position
+                for position, char in enumerate(word_display):
+                    if char == "_":
+                        candidates &= ~index.at[position].get(letter, 0)
+            else:
+                candidates &= ~index.contains.get(letter, 0)
+
+        state = SolverState(self, index, candidates, list(word_display), set(guessed_letters))
+        if candidates and candidates.bit_count() * COMPACT_RATIO < len(index.words):
+            state.index = index.subset(candidates)
+            state.candidates = state.index.all
+        return state
+
+    def suggest(self, word_display, guessed_letters=()):
+        """Return the best next letter for a game in progress, or None if no word fits."""
+        return self.state(word_display, guessed_letters).best_letter()
+
+    def rate_word(self, word):
+        """
+        Rate how hard a word is by letting the solver play it.
+
+        Returns:
+            int: Incorrect guesses the solver makes before revealing the word
+        """
+        state = self.state(["_" if char.isalpha() else char for char in word])
+        misses = 0
+        while "_" in state.pattern:
+            letter = state.best_letter()
+            if letter is None:
+                break  # The word is not in the solver's list
+            positions = [i for i, char in enumerate(word) if char == letter]
+            misses += not positions
+            state.guess(letter, positions)
+        return misses
+
+
+_solvers = {}  # (category, difficulty) -> HangmanSolver, shared by every game in the process
+
+
+def get_solver(category, difficulty):
+    """Return a solver over the word store's words for a category ("random": every category) and difficulty."""
+    key = (category, difficulty)
+    if key not in _solvers:
+        word_store = get_word_store()
+        categories = word_store.by_difficulty[difficulty] if category == "random" else [category]
+        _solvers[key] = HangmanSolver(dict.fromkeys(word for name in categories
+                                                    for word in word_store.words(name, difficulty)))
+    return _solvers[key]
@@ -0,0 +1,106 @@
+import array
+import itertools
+import os
+import random
+
+# One directory per category, holding a <difficulty>.txt word list (one word per line, UTF-8)
+WORDS_DIR = os.environ.get("HANGMAN_WORDS_DIR",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "hangman_words"))
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+class WordList:
+    """
+    A word list stored compactly: every word concatenated into one string,
+    with an array of offsets marking where each word ends.
+
+    Keeps a few bytes per word instead of a string object per word, and
+    indexing is O(1).
+    """
+
+    def __init__(self, words):
+        """Build the list from an iterable of words."""
+        words = list(words)
+        self.text = "".join(words)
+        self.ends = array.array('I', itertools.accumulate(map(len, words)))
+
+    @classmethod
+    def from_file(cls, path):
+        """Read a word list file, skipping blank lines and repeated words."""
+        with open(path, "r", encoding="utf-8") as file:
+            lines = file.read().splitlines()
+        return cls(dict.fromkeys(word for word in (line.strip().lower() for line in lines) if word))
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __getitem__(self, index):
+        """Return the word at an index."""
+        start = self.ends[index - 1] if index > 0 else 0
+        return self.text[start:self.ends[index]]
+
+    def __iter__(self):
+        start = 0
+        for end in self.ends:
+            yield self.text[start:end]
+            start = end
+
+    def random_word(self):
+        """Return a word picked uniformly at random."""
+        return self[random.randrange(len(self.ends))]
+
+
+class WordStore:
+    """
+    Word lists by category and difficulty, read from a directory on disk.
+
+    The directory is scanned once when the store is created; each list is
+    read the first time a word is picked from it and kept for the rest of
+    the process.
+    """
+
+    def __init__(self, directory=WORDS_DIR):
+        """Index the word list files under a directory."""
+        self.directory = directory
+        self.paths = {}  # (category, difficulty) -> path of its word list
+        self.lists = {}  # (category, difficulty) -> WordList, once read
+        for category in sorted(os.listdir(directory)):
+            for difficulty in DIFFICULTIES:
+                path = os.path.join(directory, category, f"{difficulty}.txt")
+                if os.path.isfile(path):
+                    self.paths[(category, difficulty)] = path
+
+        # Categories with words for each difficulty, for picking a random category
+        self.by_difficulty = {difficulty: [category for category, level in self.paths if level == difficulty]
+                              for difficulty in DIFFICULTIES}
+
+    def categories(self):
+        """Return the category names, sorted."""
+        return sorted({category for category, _ in self.paths})
+
+    def words(self, category, difficulty):
+        """Return the WordList for a category and difficulty, reading it on first use."""
+        key = (category, difficulty)
+        word_list = self.lists.get(key)
+        if word_list is None:
+            if key not in self.paths:
+                raise KeyError(f"no {difficulty} words for category '{category}'")
+            word_list = self.lists[key] = WordList.from_file(self.paths[key])
+        return word_list
+
+    def random_word(self, category, difficulty):
+        """Return a random word; category "random" first picks a category that has the difficulty."""
+        if category == "random":
+            category = random.choice(self.by_difficulty[difficulty])
+        return self.words(category, difficulty).random_word()
+
+
+_word_store = None  # Shared by every game in the process, created on first use
+
+
+def get_word_store():
+    """Return the process-wide WordStore, creating it on first call."""
+    global _word_store
+    if _word_store is None:
+        _word_store = WordStore()
+    return _word_store
@@ -1,10 +1,12 @@
-import random
 import time
-import os
 import json
 from datetime import datetime
 
-class HangmanGame:
+from hangman_engine import HIT, INVALID, REPEATED, HangmanEngine
+from hangman_render import TerminalRenderer
+
+
+class HangmanGame(HangmanEngine):
     """
     A comprehensive Hangman game with multiple features:
     - Different difficulty levels
@@ -18,54 +20,9 @@ class HangmanGame:
     
     def __init__(self):
         """Initialize the Hangman game with default settings."""
-        # Game configuration
-        self.max_incorrect_guesses = 6  # Number of attempts before game over
-        self.current_incorrect_guesses = 0  # Current number of incorrect guesses
-        self.guessed_letters = []  # Letters already guessed
-        self.word_to_guess = ""  # The word player needs to guess
-        self.word_display = []  # Word display with revealed letters and underscores
-        self.game_over = False  # Flag to track if the game is over
-        self.game_won = False  # Flag to track if the player won
+        # Game rules and state
+        super().__init__()
         self.current_player = "Guest"  # Default player name
-        self.score = 0  # Player's score for the current game
-        self.difficulty = "medium"  # Default difficulty level
-        self.category = "random"  # Default word category
-        self.game_start_time = None  # Track when the game started
-        self.game_end_time = None  # Track when the game ended
-        self.hints_used = 0  # Track how many hints were used
-        
-        # Word categories with words of varying difficulties
-        self.word_categories = {
-            "animals": {
-                "easy": ["dog", "cat", "fish", "bird", "frog", "duck", "cow", "pig", "fox", "wolf", "ant", "lion"],
-                "medium": ["dolphin", "elephant", "penguin", "kangaroo", "leopard", "giraffe", "zebra", "monkey", "turtle", "tortoise", "narwhal"],
-                "hard": ["platypus", "rhinoceros", "hippopotamus", "chameleon", "crocodile", "chimpanzee", "porcupine", "orangutan", "anaconda", "tarantula", "sugarglider", "grasshopper"]
-            },
-            "countries": {
-                "easy": ["spain", "japan", "italy", "egypt", "india", "china", "cuba", "mali", "usa", "uk"],
-                "medium": ["austrailia", "germany", "canada", "mexico", "brazil", "turkey", "russia", "sweden", "ireland", "iceland", "austria"],
-                "hard": ["kazakhstan", "zimbabwe", "uruguay", "switzerland", "phillipines", "madagascar", "mongolia", "nicaragua", "azerbaijan", "bangladesh", "united states of america", "united kingdom"]
-            },
-            "technology": {
-                "easy": ["mouse", "phone", "code", "game", "data", "blog", "wifi", "chip", "site", "byte", "html", "css", "ipv4", "ipv6", "ascii"],
-                "medium": ["keyboard", "internet", "software", "hardware", "database", "network", "website", "computer", "computer", "algorithm", "decrypt", "encrypt"],
-                "hard": ["cryptography", "blockchain", "javascript", "middleware", "kubernetes", "recursion", "virtualisation", "microservice", "authentication", "algorithm", "ip address", "encryption", "decryption"]
-            },
-            "space": {
-                "easy": ["star", "moon", "mars", "sun", "sky", "earth", "space", "comet", "venus", "pluto"],
-                "medium": ["galaxy", "jupiter", "neptune", "planet", "asteroid", "meteor", "saturn", "gravity", "cosmos", "telescope"],
-                "hard": ["constellation", "supernova", "spacecraft", "atmosphere", "nebulosity", "satellite", "observatory", "interstellar", "gravitational", "astrophysics", "supernovae", "astronomy"]
-            },
-            "food": {
-                "easy": ["cake", "rice", "fish", "meat", "milk", "corn", "soup", "taco", "pie", "pizza", "egg"],
-                "medium": ["chicken", "burger", "spaghetti", "sanwich", "chocolate", "pancake", "lasagna", "burrito", "waffle", "peppersoup", "grills"],
-                "hard": ["quesadilla", "croissant", "asparagus", "blueberry", "carbonara", "guacamole", "cheescake", "stroganoff", "bruschetta", "frittata", "grilled chicken", "grilled cheese"]
-            },
-            "cars": {
-                "medium": ["toyota", "honda", "lexus", "acura", "audi", "kia", "tesla", "fiat"],
-                "hard": ["resvani", "porsche", "lamborghini", "bugatti", "ferrari", "lotus", "hyundai", "škoda", "maserati", "aston-martin"]
-        }
-    }
         
         # Player profiles storage
         self.player_profiles = {}
@@ -175,10 +132,16 @@ class HangmanGame:
            |   |   |          ||             |   |   |_____ |          ||          |     |   |
            |___|   |__________||_____________|   |_________||__________||__________|     |___|
         """
+        
+        # Screen output; the art drawn every turn is encoded once here, without its blank
+        # first and last lines, so a frame takes as few rows as it can
+        self.renderer = TerminalRenderer()
+        self.title_lines = self.renderer.encode(self.title_art.rstrip().lstrip("\n"))
+        self.stage_lines = [self.renderer.encode(stage.rstrip().lstrip("\n")) for stage in self.hangman_stages]
 
     def clear_screen(self):
         """Clear the console screen (works on Windows, macOS, and Linux)."""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        self.renderer.clear()
     
     def load_player_profiles(self):
         """Load player profiles from a JSON file if it exists."""
@@ -289,142 +252,45 @@ class HangmanGame:
         print(f"{'=' * 40}")
         input("\nPress Enter to continue...")
     
-    def choose_random_word(self):
-        """Choose a random word based on the current category and difficulty."""
-        # Get words from the selected category or from all categories if 'random'
-        if self.category == "random":
-            # If random category, pick a random category first
-            category_name = random.choice(list(self.word_categories.keys()))
-            words = self.word_categories[category_name][self.difficulty]
-        else:
-            words = self.word_categories[self.category][self.difficulty]
-        
-        # Return a random word from the list
-        return random.choice(words)
-    
-    def initialize_word_display(self):
-        """Initialize the word display with underscores for each letter."""
-        self.word_display = ["_" for _ in self.word_to_guess]
-    
     def display_game(self):
-        """Display the current state of the game."""
-        self.clear_screen()
-        
-        # Display title
-        print(self.title_art)
-        
-        # Display game information
-        print(f"\nPlayer: {self.current_player} | Difficulty: {self.difficulty.capitalize()} | Category: {self.category.capitalize()}")
-        print(f"Score: {self.score} | Hints Used: {self.hints_used}")
-        
-        # Display hangman ASCII art
-        print(self.hangman_stages[self.current_incorrect_guesses])
-        
-        # Display word with guessed letters
-        print("\nWord: " + " ".join(self.word_display))
-        
-        # Display guessed letters
-        print("\nGuessed letters: " + ", ".join(sorted(self.guessed_letters)) if self.guessed_letters else "\nGuessed letters: None")
-        
-        # Display remaining attempts
+        """Display the current state of the game, redrawing only the lines that changed."""
+        encode = self.renderer.encode
         remaining = self.max_incorrect_guesses - self.current_incorrect_guesses
-        print(f"\nRemaining attempts: {remaining}")
-    
-    def update_word_display(self, letter):
-        """Update the word display with the correctly guessed letter."""
-        for i in range(len(self.word_to_guess)):
-            if self.word_to_guess[i] == letter:
-                self.word_display[i] = letter
-    
-    def is_word_guessed(self):
-        """Check if the word has been completely guessed."""
-        return "_" not in self.word_display
+        guessed = ", ".join(self.guessed_letters) if self.guessed_mask else "None"
+        
+        # Title, game information, hangman ASCII art, word, guessed letters and remaining attempts
+        lines = list(self.title_lines)
+        lines += encode(f"\nPlayer: {self.current_player} | Difficulty: {self.difficulty.capitalize()} | Category: {self.category.capitalize()}")
+        lines += encode(f"Score: {self.score} | Hints Used: {self.hints_used}")
+        lines += self.stage_lines[self.current_incorrect_guesses]
+        lines += encode("\nWord: " + " ".join(self.word_display))
+        lines += encode("Guessed letters: " + guessed)
+        lines += encode(f"Remaining attempts: {remaining}")
+        self.renderer.draw(lines)
     
     def process_guess(self, guess):
         """Process a player's guess."""
-        # Check if the guess is a single letter
-        if len(guess) != 1 or not guess.isalpha():
+        result = self.guess(guess)
+        if result == INVALID:
             print("Please enter a single letter.")
             time.sleep(1)
             return
-        
-        # Convert to lowercase
-        guess = guess.lower()
-        
-        # Check if the letter has already been guessed
-        if guess in self.guessed_letters:
+        if result == REPEATED:
             print("You already guessed that letter!")
             time.sleep(1)
             return
         
-        # Add the letter to guessed letters
-        self.guessed_letters.append(guess)
-        
-        # Check if the guess is correct
-        if guess in self.word_to_guess:
-            print("Good guess!")
-            self.update_word_display(guess)
-            # Calculate score for correct guess based on difficulty
-            difficulty_multiplier = {"easy": 1, "medium": 2, "hard": 3}
-            self.score += 10 * difficulty_multiplier[self.difficulty]
-        else:
-            print("Incorrect guess!")
-            self.current_incorrect_guesses += 1
-        
-        # Check if the game is over
-        if self.is_word_guessed():
-            self.game_won = True
-            self.game_over = True
-            self.game_end_time = time.time()
-            # Bonus points for winning based on difficulty and remaining attempts
-            time_bonus = max(0, int(300 - (self.game_end_time - self.game_start_time)))
-            difficulty_multiplier = {"easy": 1, "medium": 2, "hard": 3}
-            remaining_attempts = self.max_incorrect_guesses - self.current_incorrect_guesses
-            win_bonus = 50 * difficulty_multiplier[self.difficulty] * (remaining_attempts + 1)
-            self.score += win_bonus + time_bonus
-            # Penalty for using hints
-            self.score -= self.hints_used * 25
-            self.score = max(0, self.score)  # Ensure score doesn't go negative
-        elif self.current_incorrect_guesses >= self.max_incorrect_guesses:
-            self.game_over = True
-            self.game_end_time = time.time()
-        
+        print("Good guess!" if result == HIT else "Incorrect guess!")
         time.sleep(0.5)  # Brief pause for feedback
     
     def provide_hint(self):
         """Provide a hint to the player at the cost of score reduction."""
-        if "_" not in self.word_display:
+        hint_letter = self.hint()
+        if hint_letter is None:
             print("You've already guessed the word! No hint needed.")
             time.sleep(1)
             return
         
-        # Find all hidden letters
-        hidden_indices = [i for i, char in enumerate(self.word_display) if char == "_"]
-        
-        if not hidden_indices:
-            print("No more hints available.")
-            time.sleep(1)
-            return
-        
-        # Choose a random hidden letter to reveal
-        hint_index = random.choice(hidden_indices)
-        hint_letter = self.word_to_guess[hint_index]
-        
-        # Check if the letter has already been guessed
-        if hint_letter in self.guessed_letters:
-            print("Let me find another hint...")
-            time.sleep(1)
-            self.provide_hint()  # Try again with another letter
-            return
-        
-        # Update the display and guessed letters
-        self.guessed_letters.append(hint_letter)
-        self.update_word_display(hint_letter)
-        
-        # Increment hints used counter and reduce score
-        self.hints_used += 1
-        self.score = max(0, self.score - 25)  # Reduce score but don't go below 0
-        
         print(f"Hint: The letter '{hint_letter}' is in the word!")
         time.sleep(1.5)
     
@@ -547,7 +413,7 @@ class HangmanGame:
         print("\nSelect Word Category:")
         
         # Display available categories
-        categories = list(self.word_categories.keys())
+        categories = self.word_store.categories()
         categories.append("random")  # Add random option
         
         for i, category in enumerate(categories, 1):
@@ -672,29 +538,17 @@ class HangmanGame:
         print("- Medium: Moderate words")
         print("- Hard: Challenging words")
         print("\nCategories:")
-        print("- Animals, Countries, Technology, Space, Food")
+        print("- " + ", ".join(category.capitalize() for category in self.word_store.categories()))
         print("- Random: Words from any category")
         
         input("\nPress Enter to continue...")
     
     def start_game(self):
         """Initialize and start a new game."""
-        # Reset game state
-        self.current_incorrect_guesses = 0
-        self.guessed_letters = []
-        self.game_over = False
-        self.game_won = False
-        self.score = 0
-        self.hints_used = 0
-        
-        # Select a word to guess
-        self.word_to_guess = self.choose_random_word()
-        
-        # Initialize word display
-        self.initialize_word_display()
+        # Reset game state and select a word to guess
+        self.new_game()
         
         # Start the game loop
-        self.game_start_time = time.time()
         while not self.game_over:
             # Display the current game state
             self.display_game()
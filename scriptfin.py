@@ -1,10 +1,53 @@
+import argparse
+import contextlib
+import csv
 import datetime
 import os
 import json
+import sqlite3
+import sys
+import time
+
+from finance_cache import ReportCache
+from finance_fx import BASE_CURRENCY, CURRENCY_SYMBOLS, RateTable
+from finance_import import import_file
+from finance_lock import FileLock
+from finance_partitions import PartitionedLedger
+from finance_schedules import FREQUENCIES, FREQUENCY_UNITS, due_occurrences, new_schedule
+from finance_sqlite import SQLiteStore
+from finance_stats import LedgerStats
+from finance_store import parse_cents, stored_cents
+
+# Storage backend: "json" (monthly partition and journal files) or "sqlite" (database file)
+STORAGE_BACKEND = os.environ.get("FINANCE_BACKEND", "json")
+SQLITE_FILE = "finance_data.db"
+
+# Data files: monthly partitions with a manifest, plus a journal of changes made since
+LEDGER_DIR = "finance_ledger"
+JOURNAL_FILE = "finance_data.journal"
+JOURNAL_LOCK_FILE = "finance_data.journal.lock"  # Held exclusively while appending to the journal
+SESSION_LOCK_FILE = "finance_data.session.lock"  # Held shared by every open session
+DATA_FILE = "finance_data.json"  # Single-file ledger used before partitioning
+FX_FILE = "fx_rates.csv"  # Historical exchange rates: date,currency,rate (value in BASE_CURRENCY)
+COMPACT_THRESHOLD = 1000  # Journal records before they are folded into the snapshot
+journal_encoder = json.JSONEncoder(separators=(",", ":"))  # Compact one-line records
+IMPORT_BATCH_SIZE = 50000  # Imported rows added to the store and journal at a time
+PAGE_SIZE = 50  # Transactions shown per page in view_transactions
+REPORT_CACHE_SIZE = 128  # Report and query results kept between menu actions
 
 # Initialise global variables
-transactions = []
+rates = RateTable()  # Exchange rates into BASE_CURRENCY, read by load_data
+transactions = PartitionedLedger(LEDGER_DIR, rates)
 categories = ["Food", "Transportation", "Housing", "Entertainment", "Utilities", "Applications", "Other"]
+budgets = {}  # Category -> monthly spending limit in cents
+schedules = {}  # Schedule id -> recurring transaction schedule
+ledger_stats = LedgerStats(rates)  # Per-category statistics, updated as transactions are added
+journal_seq = 0  # Sequence number of the last journal record written or loaded
+journal_records = 0  # Records in the journal that are not yet in the snapshot
+journal_offset = 0  # Bytes of the journal already read or written by this session
+journal_lock = FileLock(JOURNAL_LOCK_FILE)
+session_lock = FileLock(SESSION_LOCK_FILE)
+report_cache = ReportCache(REPORT_CACHE_SIZE)  # Results reused until the data changes
 
 
 def main():
@@ -21,11 +64,17 @@ def main():
         print("2. View all transactions")
         print("3. View spending by category")
         print("4. View monthly summary")
-        print("5. Add a new category")
+        print("5. Add a category or set a budget")
         print("6. Search transactions")
-        print("7. Save and exit")
+        print("7. Import transactions from a CSV/OFX file")
+        print("8. Check balance on a date")
+        print("9. Save and exit")
+        print(f"(Report cache: {report_cache.hits} hits, {report_cache.misses} misses; {lock_summary()})")
+        
+        choice = input("\nEnter your choice (1-9): ")
         
-        choice = input("\nEnter your choice (1-7): ")
+        # Pick up changes other sessions made while we waited for input
+        refresh_data()
         
         if choice == '1':
             add_transaction()
@@ -40,45 +89,356 @@ def main():
         elif choice == '6':
             search_transactions()
         elif choice == '7':
+            import_transactions()
+        elif choice == '8':
+            view_balance()
+        elif choice == '9':
             save_data()
             print("\nData saved. Thank you for using the Personal Finance Tracker!")
             break
         else:
-            print("Invalid choice. Please enter a number from 1 to 7.")
+            print("Invalid choice. Please enter a number from 1 to 9.")
+
+
+def format_money(cents, currency=BASE_CURRENCY):
+    # Amounts are integer cents; format them without going through floats
+    symbol = CURRENCY_SYMBOLS.get(currency, currency + " ")
+    return f"{symbol}{format_decimal(cents)}"
+
 
+def format_decimal(cents):
+    # Plain decimal form of an amount in cents, e.g. "-12.34", for exports
+    sign = "-" if cents < 0 else ""
+    return f"{sign}{abs(cents) // 100}.{abs(cents) % 100:02d}"
 
-def load_data():
-    global transactions, categories
+
+def load_data(read_only=False):
+    # read_only loads without writing anything back: no statistics are saved and no schedules materialised
+    global ledger_stats
     
-    # Check if data file exists
-    if os.path.exists("finance_data.json"):
-        try:
-            with open("finance_data.json", "r") as file:
-                data = json.load(file)
-                transactions = data.get("transactions", [])
-                loaded_categories = data.get("categories", [])
-                
-                # Update categories list with any saved categories
-                if loaded_categories:
-                    categories = loaded_categories
-                    
-            print("Existing data loaded successfully.")
-        except Exception as e:
-            print(f"Error loading data: {e}")
+    # Exchange rates come first, since loading converts amounts to the base currency
+    try:
+        rates.load(FX_FILE)
+    except (OSError, ValueError) as e:
+        print(f"Error loading exchange rates: {e}")
+    
+    if STORAGE_BACKEND == "sqlite":
+        load_sqlite_data()
     else:
-        print("No existing data found. Starting with a new database.")
+        load_json_data()
+    
+    # Statistics are saved with the ledger; rebuild them if they are missing, out of step, or were
+    # converted to the base currency with other exchange rates (as the stored base amounts are)
+    if ledger_stats.count != len(transactions) or ledger_stats.fx_rates != rates.fingerprint:
+        print("Rebuilding transaction statistics...")
+        ledger_stats = LedgerStats(rates)
+        ledger_stats.extend(transactions)
+        if STORAGE_BACKEND == "sqlite" and not read_only:
+            transactions.save_stats(ledger_stats)
+            transactions.commit()
+    
+    if read_only:
+        return
+    
+    # Add recurring transactions that came due since the last run
+    added = materialize_schedules()
+    if added:
+        print(f"Added {added} recurring transactions that came due.")
 
 
-def save_data():
+def materialize_schedules():
+    global schedules
+    
+    # Collect every due occurrence of every schedule, then add them as one batch
+    today = datetime.datetime.now().strftime("%Y-%m-%d")
+    if STORAGE_BACKEND == "sqlite":
+        # Reread the schedules while holding the write lock, so no other session adds the same occurrences
+        transactions.begin()
+        schedules = transactions.load_schedules()
+    occurrences = due_occurrences(schedules, today)
+    if not occurrences:
+        if STORAGE_BACKEND == "sqlite":
+            transactions.commit()
+        return 0
+    
+    added = apply_occurrences(occurrences)
+    record_change("materialize", {"occurrences": occurrences})
+    return added
+
+
+def apply_occurrences(occurrences):
+    # Add schedule occurrences in one batch, skipping any another session already added
+    batch = []
+    for schedule_id, number, transaction in occurrences:
+        schedule = schedules.get(schedule_id)
+        if schedule is not None and number == schedule["count"]:
+            batch.append(transaction)
+            schedule["count"] += 1
+    
+    if batch:
+        transactions.extend(batch)
+        ledger_stats.extend(batch)
+    return len(batch)
+
+
+def lock_summary():
+    # Lock contention across this session's file locks
+    locks = [journal_lock, session_lock]
+    acquisitions = sum(lock.acquisitions for lock in locks)
+    contended = sum(lock.contended for lock in locks)
+    wait_time = sum(lock.wait_time for lock in locks)
+    return f"locks: {acquisitions} taken, {contended} contended, {wait_time:.3f}s waiting"
+
+
+def refresh_data():
+    global categories, budgets, schedules, ledger_stats
+    
+    if STORAGE_BACKEND == "sqlite":
+        # SQLite handles concurrent writers itself; reread what other sessions may have changed
+        if transactions.refresh():
+            categories = transactions.load_categories() or categories
+            budgets = transactions.load_setting("budgets") or {}
+            schedules = transactions.load_schedules()
+            ledger_stats = transactions.load_stats(rates) or ledger_stats
+            report_cache.bump()
+    else:
+        with journal_lock:
+            if replay_journal():
+                report_cache.bump()
+
+
+def load_sqlite_data():
+    global transactions, categories, budgets, schedules, ledger_stats
+    
+    try:
+        database = SQLiteStore(SQLITE_FILE, rates)
+        
+        # Copy an existing JSON ledger into a new, empty database once
+        if not database and (os.path.exists(LEDGER_DIR) or os.path.exists(DATA_FILE)
+                             or os.path.exists(JOURNAL_FILE)):
+            print("Copying the existing JSON data into the database...")
+            load_json_data()
+            database.extend(transactions)
+            database.save_categories(categories)
+            database.save_setting("budgets", budgets)
+            database.save_schedules(schedules.values())
+            database.save_stats(ledger_stats)
+            database.commit()
+        
+        transactions = database
+        budgets = database.load_setting("budgets") or {}
+        schedules = database.load_schedules()
+        ledger_stats = database.load_stats(rates) or LedgerStats(rates)
+        loaded_categories = database.load_categories()
+        if loaded_categories:
+            categories = loaded_categories
+        else:
+            database.save_categories(categories)
+            database.commit()
+        
+        print(f"Connected to database {SQLITE_FILE}.")
+    except sqlite3.Error as e:
+        # Carrying on would mean writing to the JSON ledger while the database is configured
+        print(f"Error opening database: {e}")
+        print(f"Fix or move {SQLITE_FILE}, or set FINANCE_BACKEND=json to use the JSON ledger.")
+        sys.exit(1)
+
+
+def load_json_data():
+    global transactions, categories, budgets, schedules, ledger_stats, journal_seq, journal_records, journal_offset
+    
+    transactions = PartitionedLedger(LEDGER_DIR, rates)
+    ledger_stats = LedgerStats(rates)
+    journal_seq = 0
+    journal_records = 0
+    journal_offset = 0
+    
+    # Every open session holds this shared; the partitions are only rewritten by a session on its own
+    session_lock.acquire(shared=True)
+    
     try:
-        data = {
-            "transactions": transactions,
-            "categories": categories
-        }
+        # Only the manifest is read here; partitions are opened when a query needs them
+        manifest = transactions.load_manifest()
+        if manifest is not None:
+            journal_seq = manifest.get("journal_seq", 0)
+            if manifest.get("categories"):
+                categories = manifest["categories"]
+            budgets = manifest.get("budgets", {})
+            schedules = manifest.get("schedules", {})
+            if manifest.get("stats"):
+                ledger_stats = LedgerStats.loads(manifest["stats"], rates)
+            print(f"Existing data loaded successfully ({len(transactions)} transactions "
+                  f"in {len(transactions.partitions)} monthly partitions).")
+        elif os.path.exists(DATA_FILE):
+            # Read the old single-file ledger; the next save splits it into partitions
+            with open(DATA_FILE, "r") as file:
+                data = json.load(file)
+                old_transactions = data.get("transactions", [])
+                # The single-file ledger stored amounts in dollars
+                for transaction in old_transactions:
+                    transaction["amount"] = parse_cents(transaction["amount"])
+                transactions.extend(old_transactions)
+                journal_seq = data.get("journal_seq", 0)
+                if data.get("categories"):
+                    categories = data["categories"]
+            print("Existing data loaded successfully. It will be saved as monthly partitions.")
+        elif not os.path.exists(JOURNAL_FILE):
+            print("No existing data found. Starting with a new database.")
+    except Exception as e:
+        print(f"Error loading data: {e}")
+    
+    # Replay changes recorded after the partitions were written
+    replayed = replay_journal()
+    if replayed:
+        print(f"Recovered {replayed} unsaved changes from the journal.")
+
+
+def replay_journal():
+    global journal_seq, journal_records, journal_offset
+    
+    if not os.path.exists(JOURNAL_FILE):
+        return 0
+    
+    # Read on from where this session left off, picking up records other sessions appended
+    replayed = 0
+    with open(JOURNAL_FILE, "rb") as file:
+        file.seek(journal_offset)
+        for line in file:
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError("incomplete record")
+                record = json.loads(line)
+            except ValueError:
+                # A crash mid-append can leave a partial last line; write_journal cuts it off
+                break
+            journal_offset += len(line)
+            
+            # Records up to journal_seq are already part of the snapshot or this session
+            if record["seq"] <= journal_seq:
+                continue
+            
+            apply_record(record)
+            journal_seq = record["seq"]
+            journal_records += 1
+            replayed += 1
+    
+    return replayed
+
+
+def apply_record(record):
+    if record["op"] == "transaction":
+        record["data"]["amount"] = stored_cents(record["data"]["amount"])
+        transactions.append(record["data"])
+        ledger_stats.add(record["data"])
+    elif record["op"] == "category":
+        if record["data"] not in categories:
+            categories.append(record["data"])
+    elif record["op"] == "budget":
+        set_budget(record["data"]["category"], record["data"]["amount"])
+    elif record["op"] == "schedule":
+        schedules[record["data"]["id"]] = record["data"]
+    elif record["op"] == "materialize":
+        apply_occurrences(record["data"]["occurrences"])
+
+
+def record_change(op, data):
+    record_changes(op, [data])
+    
+    # Fold the journal into the snapshot once it grows large
+    if STORAGE_BACKEND == "json" and journal_records >= COMPACT_THRESHOLD:
+        compact_data()
+
+
+def record_changes(op, items):
+    # Every change passes through here, so cached reports are invalidated here too
+    report_cache.bump()
+    
+    # Make changes already applied in memory durable in the active backend
+    if STORAGE_BACKEND == "sqlite":
+        if op == "category":
+            transactions.save_categories(categories)
+        elif op == "budget":
+            transactions.save_setting("budgets", budgets)
+        elif op == "schedule":
+            transactions.save_schedules(items)
+        elif op == "materialize":
+            # The schedules were reread under the write lock, so every occurrence was added;
+            # save only the schedules that advanced, as other sessions may have changed the rest
+            added = LedgerStats(rates)
+            added.extend(transaction for item in items for _, _, transaction in item["occurrences"])
+            transactions.add_stats(added)
+            advanced = {schedule_id for item in items for schedule_id, _, _ in item["occurrences"]}
+            transactions.save_schedules(schedules[schedule_id] for schedule_id in advanced)
+        else:
+            # Merge statistics for just the new transactions into the saved ones
+            added = LedgerStats(rates)
+            added.extend(items)
+            transactions.add_stats(added)
+        transactions.commit()
+    else:
+        write_journal(op, items)
+
+
+def write_journal(op, items):
+    global journal_seq, journal_records, journal_offset
+    
+    with journal_lock:
+        # Merge records other sessions appended first, so sequence numbers stay unique
+        replay_journal()
         
-        with open("finance_data.json", "w") as file:
-            json.dump(data, file, indent=4)
+        # Write one compact record per change and make sure the batch reaches the disk
+        lines = []
+        for data in items:
+            journal_seq += 1
+            record = {"seq": journal_seq, "op": op, "data": data}
+            lines.append(journal_encoder.encode(record) + "\n")
+        data = "".join(lines).encode("utf-8")
+        
+        with open(JOURNAL_FILE, "ab") as file:
+            # Drop a partial record left by a crashed writer; every complete one has been read
+            if file.tell() > journal_offset:
+                file.truncate(journal_offset)
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        journal_offset += len(data)
+        journal_records += len(items)
+
+
+def compact_data():
+    global journal_records, journal_offset
+    
+    # Other sessions read the partitions lazily, so only rewrite them when no other session is open
+    if not session_lock.acquire(shared=False, blocking=False):
+        return False
+    
+    try:
+        with journal_lock:
+            replay_journal()
+            
+            # Rewrite only the partitions changed since the last save, then the manifest
+            transactions.save(journal_seq, {"categories": categories, "budgets": budgets, "schedules": schedules,
+                                            "stats": ledger_stats.dumps(), "journal_seq": journal_seq})
             
+            # The partitions now cover every journal record, so the journal can go
+            if os.path.exists(JOURNAL_FILE):
+                os.remove(JOURNAL_FILE)
+            journal_records = 0
+            journal_offset = 0
+    finally:
+        session_lock.acquire(shared=True)
+    return True
+
+
+def save_data():
+    try:
+        if STORAGE_BACKEND == "sqlite":
+            transactions.commit()
+        elif compact_data():
+            # The search index is rewritten whole, so it is only saved here rather than on every compaction
+            transactions.save_index()
+        else:
+            print("Another session is open, so changes stay in the journal until it closes.")
         print("Data saved successfully.")
     except Exception as e:
         print(f"Error saving data: {e}")
@@ -96,9 +456,8 @@ def add_transaction():
             break
             
         try:
-            # Validate date format
-            datetime.datetime.strptime(date_str, "%Y-%m-%d")
-            date = date_str
+            # Validate date format and store it zero-padded
+            date = datetime.datetime.strptime(date_str, "%Y-%m-%d").strftime("%Y-%m-%d")
             break
         except ValueError:
             print("Invalid date format. Please use YYYY-MM-DD format.")
@@ -109,7 +468,7 @@ def add_transaction():
     # Get transaction amount and type
     while True:
         try:
-            amount = float(input("Enter amount: "))
+            amount = parse_cents(input("Enter amount: "))
             if amount <= 0:
                 print("Amount must be positive.")
                 continue
@@ -117,6 +476,16 @@ def add_transaction():
         except ValueError:
             print("Invalid amount. Please enter a number.")
     
+    # Ask for the currency only when exchange rates are set up for more than one
+    currency = BASE_CURRENCY
+    currencies = rates.currencies()
+    if len(currencies) > 1:
+        while True:
+            currency = input(f"Enter currency ({'/'.join(currencies)}), or leave blank for {BASE_CURRENCY}: ").strip().upper() or BASE_CURRENCY
+            if currency in currencies:
+                break
+            print(f"Unknown currency. Add its rates to {FX_FILE} first.")
+    
     # Determine if it's income or expense
     while True:
         trans_type = input("Is this income or expense? (i/e): ").lower()
@@ -145,17 +514,94 @@ def add_transaction():
             except ValueError:
                 print("Invalid input. Please enter a number.")
     
+    # Optionally repeat the transaction on a schedule
+    schedule_rule = ask_schedule_rule()
+    
     # Create and add the transaction
     transaction = {
         "date": date,
         "description": description,
         "amount": amount,
+        "currency": currency,
         "type": trans_type,
         "category": category
     }
     
-    transactions.append(transaction)
+    # Compare against the category's history before the new amount becomes part of it
+    alerts = check_alerts(transaction)
+    
+    try:
+        transactions.append(transaction)
+    except ValueError:
+        print(f"Invalid amount. It is too large once converted to {BASE_CURRENCY}.")
+        return
+    ledger_stats.add(transaction)
+    record_change("transaction", transaction)
     print("Transaction added successfully!")
+    
+    for alert in alerts:
+        print(f"Alert: {alert}")
+    
+    if schedule_rule:
+        # The transaction just added is the first occurrence; add any later ones already due
+        schedule = new_schedule(transaction, *schedule_rule)
+        schedules[schedule["id"]] = schedule
+        record_change("schedule", schedule)
+        added = materialize_schedules()
+        print(f"Recurring {schedule['frequency']} schedule saved"
+              + (f"; {added} past occurrences added." if added else "."))
+
+
+def ask_schedule_rule():
+    frequency = input(f"Repeat this transaction? ({'/'.join(FREQUENCIES)}), or press Enter for no: ").strip().lower()
+    if not frequency:
+        return None
+    while frequency not in FREQUENCIES:
+        frequency = input(f"Please enter one of {', '.join(FREQUENCIES)}: ").strip().lower()
+    
+    while True:
+        interval = input(f"Repeat every how many {FREQUENCY_UNITS[frequency]}? (press Enter for 1): ").strip()
+        if not interval:
+            interval = 1
+            break
+        if interval.isdigit() and int(interval) > 0:
+            interval = int(interval)
+            break
+        print("Please enter a positive whole number.")
+    
+    while True:
+        end_date = input("Enter the last date (YYYY-MM-DD), or leave blank to repeat indefinitely: ").strip()
+        if not end_date:
+            return frequency, interval, None
+        try:
+            return frequency, interval, datetime.datetime.strptime(end_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            print("Invalid date format. Please use YYYY-MM-DD format.")
+
+
+def check_alerts(transaction):
+    if transaction["type"] != "Expense":
+        return []
+    
+    alerts = []
+    category = transaction["category"]
+    amount = rates.to_base(transaction)  # Statistics and budgets are in the base currency
+    
+    # Flag an expense far above what the category usually sees
+    if ledger_stats.is_outlier(category, amount):
+        stats = ledger_stats.categories[category]
+        alerts.append(f"{format_money(amount)} is unusually large for {category} "
+                      f"(average {format_money(round(stats.mean))}).")
+    
+    # Flag a month's spending going over the category budget
+    budget = budgets.get(category)
+    if budget is not None:
+        spent = ledger_stats.month_total(category, transaction["date"][:7]) + amount
+        if spent > budget:
+            alerts.append(f"{category} spending for {transaction['date'][:7]} is {format_money(spent)}, "
+                          f"over its budget of {format_money(budget)}.")
+    
+    return alerts
 
 
 def view_transactions():
@@ -175,62 +621,63 @@ def view_transactions():
     # Get sorting choice
     sort_choice = input("Enter sorting option (1-5), or press Enter for default (newest first): ")
     
-    # Create a copy of transactions for sorting
-    sorted_transactions = transactions.copy()
-    
-    # Apply sorting based on user choice
+    # Pick the sort column and direction
     if sort_choice == '2':
-        sorted_transactions.sort(key=lambda x: x["date"])
+        column, reverse = "date", False
     elif sort_choice == '3':
-        sorted_transactions.sort(key=lambda x: x["amount"], reverse=True)
+        column, reverse = "amount", True
     elif sort_choice == '4':
-        sorted_transactions.sort(key=lambda x: x["amount"])
+        column, reverse = "amount", False
     elif sort_choice == '5':
-        sorted_transactions.sort(key=lambda x: x["type"])
+        column, reverse = "type", False
     else:  # Default or option 1
-        sorted_transactions.sort(key=lambda x: x["date"], reverse=True)
-    
-    # Display transactions in table format
-    print("\n" + "-" * 80)
-    print(f"{'Date':<12} {'Description':<25} {'Amount':>10} {'Type':<10} {'Category':<15}")
-    print("-" * 80)
-    
-    for transaction in sorted_transactions:
-        amount_str = f"${transaction['amount']:.2f}"
-        print(f"{transaction['date']:<12} {transaction['description'][:25]:<25} {amount_str:>10} "
-              f"{transaction['type']:<10} {transaction['category']:<15}")
+        column, reverse = "date", True
     
-    print("-" * 80)
+    # Display transactions in table format, one page at a time
+    total_count = len(transactions)
+    offset = 0
+    while True:
+        page = report_cache.get("page", (column, reverse, offset),
+                                lambda: transactions.page_ids(column, reverse, offset, PAGE_SIZE))
+        
+        print("\n" + "-" * 80)
+        print(f"{'Date':<12} {'Description':<25} {'Amount':>10} {'Type':<10} {'Category':<15}")
+        print("-" * 80)
+        
+        lines = []
+        for transaction in transactions.rows(page):
+            amount_str = format_money(transaction['amount'], transaction['currency'])
+            lines.append(f"{transaction['date']:<12} {transaction['description'][:25]:<25} {amount_str:>10} "
+                         f"{transaction['type']:<10} {transaction['category']:<15}")
+        print("\n".join(lines))
+        
+        print("-" * 80)
+        offset += len(page)
+        print(f"Showing {offset - len(page) + 1}-{offset} of {total_count} transactions.")
+        
+        if offset >= total_count:
+            break
+        if input("Press Enter for the next page, or 'q' to stop: ").lower() == 'q':
+            break
     
-    # Calculate and display summary
-    income = sum(t["amount"] for t in transactions if t["type"] == "Income")
-    expenses = sum(t["amount"] for t in transactions if t["type"] == "Expense")
+    # Display the summary from the running totals
+    income, expenses = report_cache.get("totals", (), transactions.totals)
     balance = income - expenses
     
-    print(f"\nTotal Income: ${income:.2f}")
-    print(f"Total Expenses: ${expenses:.2f}")
-    print(f"Current Balance: ${balance:.2f}")
+    print(f"\nTotal Income: {format_money(income)}")
+    print(f"Total Expenses: {format_money(expenses)}")
+    print(f"Current Balance: {format_money(balance)}")
 
 
 def view_by_category():
-    # Filter for expense transactions only
-    expense_transactions = [t for t in transactions if t["type"] == "Expense"]
+    # Calculate spending by category (expense transactions only)
+    category_totals = report_cache.get("category", ("Expense", None),
+                                       lambda: transactions.category_totals("Expense"))
     
-    if not expense_transactions:
+    if not category_totals:
         print("\nNo expense transactions to analyze.")
         return
     
-    # Calculate spending by category
-    category_totals = {}
-    for transaction in expense_transactions:
-        category = transaction["category"]
-        amount = transaction["amount"]
-        
-        if category in category_totals:
-            category_totals[category] += amount
-        else:
-            category_totals[category] = amount
-    
     # Calculate total expenses
     total_expenses = sum(category_totals.values())
     
@@ -244,13 +691,13 @@ def view_by_category():
     
     for category, amount in sorted_categories:
         percentage = (amount / total_expenses) * 100
-        amount_str = f"${amount:.2f}"
+        amount_str = format_money(amount)
         percentage_str = f"{percentage:.1f}%"
         
         print(f"{category:<15} {amount_str:>10} {percentage_str:>12}")
     
     print("-" * 40)
-    print(f"{'Total':<15} ${total_expenses:.2f}")
+    print(f"{'Total':<15} {format_money(total_expenses)}")
     
     # Visual representation (simple text-based bar chart)
     print("\n----- Spending Distribution -----")
@@ -269,34 +716,21 @@ def view_monthly_summary():
         print("\nNo transactions to analyze.")
         return
     
-    # Get all distinct year-month combinations
-    months = set()
-    for transaction in transactions:
-        date = transaction["date"]
-        year_month = date[:7]  # Extract YYYY-MM
-        months.add(year_month)
-    
-    # Sort months chronologically
-    months = sorted(list(months))
+    # Read income and expenses per month from the rollup (sorted chronologically)
+    monthly_totals = report_cache.get("monthly", (), transactions.monthly_totals)
     
-    # Calculate totals for each month
+    # Display totals for each month
     print("\n----- Monthly Summary -----")
     print(f"{'Month':<10} {'Income':>12} {'Expenses':>12} {'Balance':>12}")
     print("-" * 50)
     
-    for year_month in months:
-        # Filter transactions for this month
-        month_transactions = [t for t in transactions if t["date"].startswith(year_month)]
-        
-        # Calculate income and expenses
-        income = sum(t["amount"] for t in month_transactions if t["type"] == "Income")
-        expenses = sum(t["amount"] for t in month_transactions if t["type"] == "Expense")
+    for year_month, income, expenses in monthly_totals:
         balance = income - expenses
         
         # Format strings
-        income_str = f"${income:.2f}"
-        expenses_str = f"${expenses:.2f}"
-        balance_str = f"${balance:.2f}"
+        income_str = format_money(income)
+        expenses_str = format_money(expenses)
+        balance_str = format_money(balance)
         
         # Determine balance color indicator (just using text)
         balance_indicator = " (profit)" if balance >= 0 else " (loss)"
@@ -304,18 +738,68 @@ def view_monthly_summary():
         print(f"{year_month:<10} {income_str:>12} {expenses_str:>12} {balance_str:>12}{balance_indicator}")
     
     print("-" * 50)
+    
+    # Offer a spending breakdown for a single month
+    year_month = input("\nEnter a month (YYYY-MM) to see its spending by category, or press Enter to return: ").strip()
+    if not year_month:
+        return
+    
+    category_totals = report_cache.get("category", ("Expense", year_month),
+                                       lambda: transactions.category_totals("Expense", year_month))
+    if not category_totals:
+        print(f"No expenses recorded for {year_month}.")
+        return
+    
+    print(f"\n----- Spending in {year_month} -----")
+    print(f"{'Category':<15} {'Amount':>10}")
+    print("-" * 27)
+    for category, amount in sorted(category_totals.items(), key=lambda x: x[1], reverse=True):
+        amount_str = format_money(amount)
+        print(f"{category:<15} {amount_str:>10}")
+    print("-" * 27)
+
+
+def view_balance():
+    print("\n----- Check Balance -----")
+    print("1. Balance as of a date")
+    print("2. Net change between two dates")
+    
+    balance_choice = input("Enter option (1-2): ")
+    
+    try:
+        if balance_choice == '1':
+            date = input("Enter date (YYYY-MM-DD), or leave blank for today: ")
+            if not date:
+                date = datetime.datetime.now().strftime("%Y-%m-%d")
+            date = datetime.datetime.strptime(date, "%Y-%m-%d").strftime("%Y-%m-%d")
+            
+            balance = report_cache.get("balance", (date,), lambda: transactions.balance_as_of(date))
+            print(f"\nBalance at the end of {date}: {format_money(balance)}")
+        elif balance_choice == '2':
+            start_date = input("Enter start date (YYYY-MM-DD): ")
+            end_date = input("Enter end date (YYYY-MM-DD): ")
+            start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+            end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+            
+            change = report_cache.get("change", (start_date, end_date),
+                                      lambda: transactions.balance_between(start_date, end_date))
+            print(f"\nNet change from {start_date} to {end_date}: {format_money(change)}")
+        else:
+            print("Invalid choice.")
+    except ValueError:
+        print("Invalid date format. Please use YYYY-MM-DD format.")
 
 
 def add_category():
-    print("\n----- Add New Category -----")
+    print("\n----- Add Category or Set Budget -----")
     
     # Show current categories
     print("Current categories:")
     for i, category in enumerate(categories, 1):
         print(f"{i}. {category}")
     
-    # Get new category name
-    new_category = input("\nEnter new category name: ").strip()
+    # Get a new category name, or an existing one to budget
+    new_category = input("\nEnter a new or existing category name: ").strip()
     
     # Validate input
     if not new_category:
@@ -324,11 +808,40 @@ def add_category():
     
     if new_category in categories:
         print(f"Category '{new_category}' already exists.")
+    else:
+        # Add the new category
+        categories.append(new_category)
+        record_change("category", new_category)
+        print(f"Category '{new_category}' added successfully.")
+    
+    # Offer a monthly budget, which add_transaction checks new expenses against
+    current = budgets.get(new_category)
+    current_str = format_money(current) if current is not None else "none"
+    budget_str = input(f"Enter a monthly budget for {new_category} (currently {current_str}), "
+                       f"'none' to remove it, or press Enter to keep it: ").strip().lower()
+    if not budget_str:
+        return
+    
+    try:
+        amount = None if budget_str == "none" else parse_cents(budget_str)
+    except ValueError:
+        print("Invalid amount. The budget was not changed.")
+        return
+    if amount is not None and amount <= 0:
+        print("Budget must be positive. The budget was not changed.")
         return
     
-    # Add the new category
-    categories.append(new_category)
-    print(f"Category '{new_category}' added successfully.")
+    set_budget(new_category, amount)
+    record_change("budget", {"category": new_category, "amount": amount})
+    print(f"Budget for {new_category} set to {format_money(amount) if amount is not None else 'none'}.")
+
+
+def set_budget(category, amount):
+    # A budget of None removes the limit
+    if amount is None:
+        budgets.pop(category, None)
+    else:
+        budgets[category] = amount
 
 
 def search_transactions():
@@ -347,8 +860,14 @@ def search_transactions():
     
     if search_choice == '1':
         # Search by description
-        search_term = input("Enter search term: ").lower()
-        results = [t for t in transactions if search_term in t["description"].lower()]
+        search_terms = input("Enter search term(s): ").lower()
+        match_all = True
+        if len(search_terms.split()) > 1:
+            match_choice = input("Match all terms or any term? (all/any), or press Enter for all: ").lower()
+            match_all = match_choice != "any"
+        
+        results = report_cache.get("description", (search_terms, match_all),
+                                   lambda: transactions.find_description(search_terms, match_all))
         
     elif search_choice == '2':
         # Search by date range
@@ -357,10 +876,11 @@ def search_transactions():
         
         try:
             # Validate dates
-            datetime.datetime.strptime(start_date, "%Y-%m-%d")
-            datetime.datetime.strptime(end_date, "%Y-%m-%d")
+            start_date = datetime.datetime.strptime(start_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+            end_date = datetime.datetime.strptime(end_date, "%Y-%m-%d").strftime("%Y-%m-%d")
             
-            results = [t for t in transactions if start_date <= t["date"] <= end_date]
+            results = report_cache.get("dates", (start_date, end_date),
+                                       lambda: transactions.find_date_range(start_date, end_date))
         except ValueError:
             print("Invalid date format. Please use YYYY-MM-DD format.")
             return
@@ -368,10 +888,11 @@ def search_transactions():
     elif search_choice == '3':
         # Search by amount range
         try:
-            min_amount = float(input("Enter minimum amount: "))
-            max_amount = float(input("Enter maximum amount: "))
+            min_amount = parse_cents(input(f"Enter minimum amount ({BASE_CURRENCY}): "))
+            max_amount = parse_cents(input(f"Enter maximum amount ({BASE_CURRENCY}): "))
             
-            results = [t for t in transactions if min_amount <= t["amount"] <= max_amount]
+            results = report_cache.get("amounts", (min_amount, max_amount),
+                                       lambda: transactions.find_amount_range(min_amount, max_amount))
         except ValueError:
             print("Invalid amount. Please enter numbers.")
             return
@@ -386,7 +907,8 @@ def search_transactions():
             cat_choice = int(input(f"Select category (1-{len(categories)}): "))
             if 1 <= cat_choice <= len(categories):
                 category = categories[cat_choice-1]
-                results = [t for t in transactions if t["category"] == category]
+                results = report_cache.get("category_rows", (category,),
+                                           lambda: transactions.find_category(category))
             else:
                 print(f"Please enter a number between 1 and {len(categories)}.")
                 return
@@ -407,14 +929,272 @@ def search_transactions():
     print(f"{'Date':<12} {'Description':<25} {'Amount':>10} {'Type':<10} {'Category':<15}")
     print("-" * 80)
     
-    for transaction in results:
-        amount_str = f"${transaction['amount']:.2f}"
+    for transaction in transactions.rows(results):
+        amount_str = format_money(transaction['amount'], transaction['currency'])
         print(f"{transaction['date']:<12} {transaction['description'][:25]:<25} {amount_str:>10} "
               f"{transaction['type']:<10} {transaction['category']:<15}")
     
     print("-" * 80)
 
 
+
+def import_transactions():
+    print("\n----- Import Transactions -----")
+    print("CSV files need a header row with at least 'date' and 'amount' columns.")
+    print("Negative amounts are treated as expenses unless a 'type' column is present.")
+    
+    path = input("Enter the path of a CSV or OFX file: ").strip()
+    if not os.path.isfile(path):
+        print(f"File '{path}' not found.")
+        return
+    
+    start_time = time.perf_counter()
+    imported, rejected, error = import_path(path)
+    if error:
+        print(f"Error importing file: {error}")
+    
+    # Report throughput
+    elapsed = time.perf_counter() - start_time
+    rate = (imported + rejected) / elapsed if elapsed > 0 else 0
+    print(f"Imported {imported} transactions, rejected {rejected} rows.")
+    print(f"Processed {imported + rejected} rows in {elapsed:.2f} seconds ({rate:,.0f} rows/s).")
+
+
+# ----- Python API -----
+# These functions work on the loaded ledger (call load_data() first) and
+# return data instead of printing. Amounts are integer cents. Reports that
+# can be long are generators, so callers can stream them.
+
+
+def import_path(path):
+    """
+    Import a CSV or OFX file into the ledger.
+    
+    Rows parsed before an error are kept, so the store and journal stay in step.
+    
+    Returns:
+        tuple: (imported rows, rejected rows, error message or None)
+    """
+    imported = 0
+    rejected = 0
+    error = None
+    pending = []
+    try:
+        # Parse in worker processes and add the results to the store and journal in batches
+        for parsed, parsed_rejected in import_file(path, categories, currencies=rates.currencies()):
+            rejected += parsed_rejected
+            pending.extend(parsed)
+            if len(pending) >= IMPORT_BATCH_SIZE:
+                transactions.extend(pending)
+                ledger_stats.extend(pending)
+                record_changes("transaction", pending)
+                imported += len(pending)
+                pending = []
+    except Exception as e:
+        error = str(e)
+    
+    if pending:
+        transactions.extend(pending)
+        ledger_stats.extend(pending)
+        record_changes("transaction", pending)
+        imported += len(pending)
+    
+    if STORAGE_BACKEND == "json" and journal_records >= COMPACT_THRESHOLD:
+        compact_data()
+    return imported, rejected, error
+
+
+def monthly_report(first_month=None, last_month=None):
+    """Yield {"month", "income", "expenses", "balance"} dicts, oldest month first."""
+    for year_month, income, expenses in report_cache.get("monthly", (), transactions.monthly_totals):
+        if (first_month is None or year_month >= first_month) and (last_month is None or year_month <= last_month):
+            yield {"month": year_month, "income": income, "expenses": expenses, "balance": income - expenses}
+
+
+def category_report(trans_type="Expense", year_month=None):
+    """Return [{"category", "amount"}] for one type, optionally within one month, largest first."""
+    totals = report_cache.get("category", (trans_type, year_month),
+                              lambda: transactions.category_totals(trans_type, year_month))
+    return [{"category": category, "amount": amount}
+            for category, amount in sorted(totals.items(), key=lambda x: x[1], reverse=True)]
+
+
+def balance_report(date):
+    """Return {"date", "balance"} for the balance at the end of date (YYYY-MM-DD)."""
+    return {"date": date, "balance": transactions.balance_as_of(date)}
+
+
+def list_transactions(column="date", reverse=True):
+    """Yield every transaction ordered by "date", "amount" or "type", a page at a time."""
+    offset = 0
+    while True:
+        page = transactions.page_ids(column, reverse, offset, IMPORT_BATCH_SIZE)
+        yield from transactions.rows(page)
+        if len(page) < IMPORT_BATCH_SIZE:
+            break
+        offset += len(page)
+
+
+def search(text=None, match_all=True, start_date=None, end_date=None,
+           min_amount=None, max_amount=None, category=None):
+    """
+    Yield transactions matching every given filter.
+    
+    The first filter given (in argument order) is answered from an index;
+    the rest are checked row by row on its results.
+    
+    Args:
+        text (str): Words the description must contain
+        match_all (bool): Require every word of text (False: any word)
+        start_date (str): Earliest date, YYYY-MM-DD
+        end_date (str): Latest date, YYYY-MM-DD
+        min_amount (int): Smallest amount in base-currency cents
+        max_amount (int): Largest amount in base-currency cents
+        category (str): Category name
+    """
+    dates_given = start_date is not None or end_date is not None
+    amounts_given = min_amount is not None or max_amount is not None
+    start_date = start_date or "0001-01-01"
+    end_date = end_date or "9999-12-31"
+    min_amount = min_amount if min_amount is not None else 0
+    max_amount = max_amount if max_amount is not None else 2 ** 63 - 1
+    
+    if text:
+        rows = transactions.rows(transactions.find_description(text, match_all))
+    elif dates_given:
+        rows = transactions.rows(transactions.find_date_range(start_date, end_date))
+    elif amounts_given:
+        rows = transactions.rows(transactions.find_amount_range(min_amount, max_amount))
+    elif category is not None:
+        rows = transactions.rows(transactions.find_category(category))
+    else:
+        rows = iter(transactions)
+    
+    for transaction in rows:
+        if (start_date <= transaction["date"] <= end_date and min_amount <= rates.to_base(transaction) <= max_amount
+                and (category is None or transaction["category"] == category)):
+            yield transaction
+
+
+# ----- Command line -----
+
+MONEY_FIELDS = {"amount", "income", "expenses", "balance"}  # Written in decimal form
+
+
+def write_rows(rows, fields, output_format, out=sys.stdout):
+    # Write dicts one at a time, so large exports never build up in memory
+    if output_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([format_decimal(row[field]) if field in MONEY_FIELDS else row[field]
+                             for field in fields])
+    elif output_format == "json":
+        # One JSON object per line
+        for row in rows:
+            out.write(json.dumps({field: format_decimal(row[field]) if field in MONEY_FIELDS else row[field]
+                                  for field in fields}) + "\n")
+    else:
+        out.write("  ".join(f"{field:<15}" for field in fields).rstrip() + "\n")
+        for row in rows:
+            values = [format_money(row[field], row.get("currency", BASE_CURRENCY)) if field in MONEY_FIELDS
+                      else str(row[field]) for field in fields]
+            out.write("  ".join(f"{value:<15}" for value in values).rstrip() + "\n")
+
+
+def parse_cli_date(text):
+    # argparse type for YYYY-MM-DD dates, returned zero-padded
+    try:
+        return datetime.datetime.strptime(text, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{text}', use YYYY-MM-DD")
+
+
+def parse_cli_month(text):
+    # argparse type for YYYY-MM months
+    try:
+        return datetime.datetime.strptime(text, "%Y-%m").strftime("%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid month '{text}', use YYYY-MM")
+
+
+def parse_cli_amount(text):
+    # argparse type for amounts, returned in cents
+    try:
+        return parse_cents(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid amount '{text}'")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Personal finance tracker. Run without arguments for the menu.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    report = commands.add_parser("report", help="print a report")
+    report.add_argument("kind", choices=["monthly", "category", "transactions", "balance"])
+    report.add_argument("--from", dest="first", type=parse_cli_month, help="first month of a monthly report (YYYY-MM)")
+    report.add_argument("--to", dest="last", type=parse_cli_month, help="last month of a monthly report (YYYY-MM)")
+    report.add_argument("--month", type=parse_cli_month, help="limit a category report to one month (YYYY-MM)")
+    report.add_argument("--type", choices=["expense", "income"], default="expense", help="category report type")
+    report.add_argument("--sort", choices=["date", "amount", "type"], default="date", help="transaction order")
+    report.add_argument("--ascending", action="store_true", help="list transactions in ascending order")
+    report.add_argument("--date", type=parse_cli_date, help="balance date (default: today)")
+    report.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    
+    search_command = commands.add_parser("search", help="search transactions")
+    search_command.add_argument("--text", help="words the description must contain")
+    search_command.add_argument("--any", action="store_true", help="match any word of --text instead of all")
+    search_command.add_argument("--from", dest="start", type=parse_cli_date, help="earliest date (YYYY-MM-DD)")
+    search_command.add_argument("--to", dest="end", type=parse_cli_date, help="latest date (YYYY-MM-DD)")
+    search_command.add_argument("--min", type=parse_cli_amount, help="smallest amount")
+    search_command.add_argument("--max", type=parse_cli_amount, help="largest amount")
+    search_command.add_argument("--category", help="category name")
+    search_command.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    
+    import_command = commands.add_parser("import", help="import a CSV or OFX file")
+    import_command.add_argument("path")
+    return parser
+
+
+def run_cli(argv):
+    args = build_parser().parse_args(argv)
+    
+    # Status messages go to stderr so they never mix with report output; reports and
+    # searches only read, so they leave due schedules for the next session that writes
+    with contextlib.redirect_stdout(sys.stderr):
+        load_data(read_only=args.command != "import")
+    
+    transaction_fields = ["date", "description", "amount", "currency", "type", "category"]
+    if args.command == "report":
+        if args.kind == "monthly":
+            write_rows(monthly_report(args.first, args.last), ["month", "income", "expenses", "balance"],
+                       args.format)
+        elif args.kind == "category":
+            write_rows(category_report(args.type.capitalize(), args.month), ["category", "amount"], args.format)
+        elif args.kind == "transactions":
+            write_rows(list_transactions(args.sort, not args.ascending), transaction_fields, args.format)
+        else:
+            date = args.date or datetime.datetime.now().strftime("%Y-%m-%d")
+            write_rows([balance_report(date)], ["date", "balance"], args.format)
+    elif args.command == "search":
+        write_rows(search(args.text, not args.any, args.start, args.end, args.min, args.max, args.category),
+                   transaction_fields, args.format)
+    else:
+        if not os.path.isfile(args.path):
+            print(f"File '{args.path}' not found.", file=sys.stderr)
+            return 1
+        imported, rejected, error = import_path(args.path)
+        with contextlib.redirect_stdout(sys.stderr):
+            save_data()
+        print(f"Imported {imported} transactions, rejected {rejected} rows.", file=sys.stderr)
+        if error:
+            print(f"Error importing file: {error}", file=sys.stderr)
+            return 1
+    return 0
+
+
 # Run the program when the script is executed
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     main()
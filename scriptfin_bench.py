@@ -0,0 +1,228 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, where peak memory is not reported
+    resource = None
+
+DEFAULT_SIZES = [10000, 100000]
+DEFAULT_SEED = 42
+DEFAULT_REPEAT = 5  # Timed runs of each query once its data is loaded
+FIRST_DATE = datetime.date(2022, 1, 1)
+DAYS = 3 * 365  # Span of the generated ledger
+
+# Vocabulary for generated descriptions
+MERCHANTS = ["Tesco", "Aldi", "Shell", "Uber", "Netflix", "Spotify", "Amazon", "Starbucks", "Ikea", "Boots",
+             "Landlord", "Vodafone", "Octopus", "Trainline", "Deliveroo", "Cinema", "Bakery", "Pharmacy"]
+DETAILS = ["groceries", "fuel", "ride", "subscription", "order", "coffee", "rent", "phone bill", "electric",
+           "ticket", "dinner", "lunch", "refund", "gift", "repair", "parking"]
+
+
+def generate_transactions(count, categories, seed=DEFAULT_SEED):
+    """
+    Generate a deterministic synthetic ledger.
+
+    The same count, categories and seed always give the same transactions.
+    About one in ten is income; expenses are spread over the given categories
+    with log-normally distributed amounts.
+
+    Args:
+        count (int): Number of transactions
+        categories (list): Expense categories to use
+        seed (int): Random seed
+
+    Returns:
+        list: Transaction dicts, amounts in integer cents
+    """
+    rng = random.Random(seed)
+    transactions = []
+    for _ in range(count):
+        date = (FIRST_DATE + datetime.timedelta(days=rng.randrange(DAYS))).isoformat()
+        description = f"{rng.choice(MERCHANTS)} {rng.choice(DETAILS)} {rng.randrange(1000)}"
+        if rng.random() < 0.1:
+            amount, trans_type, category = rng.randrange(50000, 500000), "Income", "Income"
+        else:
+            amount = max(1, int(rng.lognormvariate(7, 1.2)))
+            trans_type, category = "Expense", rng.choice(categories)
+        transactions.append({"date": date, "description": description, "amount": amount,
+                             "type": trans_type, "category": category})
+    return transactions
+
+
+def timed(function, *args):
+    """Call a function with args and return (seconds taken, result)."""
+    start_time = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start_time, result
+
+
+def peak_memory_kb():
+    """Return the peak resident memory of this process so far, in KiB (None if unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS reports bytes
+
+
+def run_size(rows, backend, seed, repeat):
+    """
+    Benchmark one ledger size in a temporary directory; meant to run in its own process.
+
+    Returns:
+        dict: Row count, timings in seconds and peak memory
+    """
+    # scriptfin keeps its files in the working directory and reads the backend on import
+    os.environ["FINANCE_BACKEND"] = backend
+    original_directory = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="scriptfin_bench_") as directory:
+        os.chdir(directory)
+        try:
+            return benchmark_ledger(rows, seed, repeat)
+        finally:
+            os.chdir(original_directory)
+
+
+def benchmark_ledger(rows, seed, repeat):
+    """Time saving, loading and querying a generated ledger in the current directory."""
+    import scriptfin
+
+    timings = {}
+    memory = {}
+
+    def record(name, seconds):
+        timings[name] = round(seconds, 6)
+        memory[name] = peak_memory_kb()
+
+    seconds, ledger = timed(lambda: generate_transactions(rows, scriptfin.categories, seed))
+    record("generate", seconds)
+
+    def add_rows(new_rows):
+        # Add rows in batches the way import_path does, so the journal or database writes
+        # and the saved statistics are part of the timing (and of what load_data reads back)
+        for start in range(0, len(new_rows), scriptfin.IMPORT_BATCH_SIZE):
+            batch = new_rows[start:start + scriptfin.IMPORT_BATCH_SIZE]
+            scriptfin.transactions.extend(batch)
+            scriptfin.ledger_stats.extend(batch)
+            scriptfin.record_changes("transaction", batch)
+
+    # Load an empty ledger, add the generated rows, then save them
+    with contextlib.redirect_stdout(io.StringIO()):
+        scriptfin.load_data()
+        seconds, _ = timed(add_rows, ledger)
+        record("add_rows", seconds)
+        seconds, _ = timed(scriptfin.save_data)
+        record("save_data", seconds)
+    del ledger
+
+    # Start again from what was saved
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds, _ = timed(scriptfin.load_data)
+    record("load_data", seconds)
+
+    last_month = (FIRST_DATE + datetime.timedelta(days=DAYS - 1)).isoformat()[:7]
+    queries = [
+        ("view_monthly_summary", lambda: (list(scriptfin.monthly_report()),
+                                          scriptfin.category_report("Expense", last_month))),
+        ("view_by_category", lambda: scriptfin.category_report("Expense")),
+        ("search_date_range", lambda: list(scriptfin.search(start_date=f"{last_month}-01",
+                                                            end_date=f"{last_month}-28"))),
+        ("search_amount_range", lambda: list(scriptfin.search(min_amount=5000, max_amount=10000))),
+        ("search_category", lambda: list(scriptfin.search(category="Food"))),
+        ("search_description", lambda: list(scriptfin.search(text="coffee starbucks"))),
+        ("search_description_any", lambda: list(scriptfin.search(text="coffee starbucks", match_all=False))),
+    ]
+    for name, query in queries:
+        # The first run includes any lazy loading; later runs show the steady state
+        scriptfin.report_cache.bump()
+        seconds, _ = timed(query)
+        record(name + "_first", seconds)
+        runs = []
+        for _ in range(repeat):
+            scriptfin.report_cache.bump()
+            runs.append(timed(query)[0])
+        record(name, statistics.median(runs))
+
+    return {"rows": rows, "timings": timings, "peak_memory_kb": memory}
+
+
+def run_all(sizes, backend, seed, repeat):
+    """Benchmark each size in a separate process, so memory peaks and state do not carry over."""
+    results = []
+    for rows in sizes:
+        print(f"Benchmarking {rows} rows ({backend})...", file=sys.stderr)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", str(rows), "--backend", backend,
+             "--seed", str(seed), "--repeat", str(repeat)],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output))
+    return results
+
+
+def print_results(results, previous=None):
+    """Print the timings as a table, with the ratio to a previous run when one is given."""
+    baseline = {}
+    if previous:
+        baseline = {result["rows"]: result["timings"] for result in previous["results"]}
+
+    for result in results:
+        print(f"\n{result['rows']} rows")
+        print(f"{'Step':<28} {'Seconds':>10} {'Peak MiB':>10}" + (f" {'vs previous':>12}" if previous else ""))
+        for name, seconds in result["timings"].items():
+            peak = result["peak_memory_kb"][name]
+            line = f"{name:<28} {seconds:>10.4f} {peak / 1024 if peak else 0:>10.1f}"
+            old = baseline.get(result["rows"], {}).get(name)
+            if old:
+                line += f" {seconds / old:>11.2f}x"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scriptfin on synthetic ledgers.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_SIZES, help="ledger sizes to benchmark")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per query")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file to write results to")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_size(args.worker, args.backend, args.seed, args.repeat)))
+        return
+
+    results = run_all(args.rows, args.backend, args.seed, args.repeat)
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, "r") as file:
+            previous = json.load(file)
+    print_results(results, previous)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+import argparse
+import asyncio
+import contextlib
+import http
+import itertools
+import json
+import random
+import signal
+import statistics
+import sys
+import time
+import urllib.parse
+
+import scriptfin
+from finance_import import build_transaction
+from finance_stats import QuantileSketch, RunningStats
+from finance_store import parse_cents
+from scriptfin_bench import generate_transactions
+
+DEFAULT_HOST = "127.0.0.1"  # Local only: the service has no authentication
+DEFAULT_PORT = 8080
+WRITE_BATCH_DELAY = 0.02  # Seconds a posted transaction waits for others to share its journal write
+WRITE_BATCH_SIZE = 5000  # Pending transactions that trigger a write without waiting
+REFRESH_INTERVAL = 1.0  # Seconds between checks for changes made by other sessions
+MAX_BODY_SIZE = 16 * 1024 * 1024  # Largest request body accepted, in bytes
+SEARCH_LIMIT = 1000  # Transactions returned by a search unless the request asks for a different limit
+LATENCY_QUANTILES = [0.5, 0.9, 0.99]
+
+
+class LatencyStats:
+    """
+    Request latencies per route.
+
+    Each route keeps running statistics and a quantile sketch of its
+    latencies in microseconds, so recording a request is O(1) and the
+    percentiles cover every request since the server started.
+    """
+
+    def __init__(self):
+        self.routes = {}  # route -> (RunningStats, QuantileSketch, [slowest])
+
+    def add(self, route, seconds):
+        """Record one request's latency."""
+        if route not in self.routes:
+            self.routes[route] = (RunningStats(), QuantileSketch(), [0])
+        stats, sketch, slowest = self.routes[route]
+        microseconds = max(round(seconds * 1000000), 1)
+        stats.add(microseconds)
+        sketch.add(microseconds)
+        slowest[0] = max(slowest[0], microseconds)
+
+    def summary(self):
+        """Return {route: {"count", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"}}."""
+        summary = {}
+        for route, (stats, sketch, slowest) in sorted(self.routes.items()):
+            summary[route] = {"count": stats.count, "mean_ms": round(stats.mean / 1000, 3)}
+            for q in LATENCY_QUANTILES:
+                summary[route][f"p{round(q * 100)}_ms"] = round(sketch.quantile(q) / 1000, 3)
+            summary[route]["max_ms"] = round(slowest[0] / 1000, 3)
+        return summary
+
+
+class HTTPError(Exception):
+    """An error reported to the client with an HTTP status code."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class FinanceServer:
+    """
+    HTTP/JSON service over the ledger loaded by scriptfin.
+
+    Every connection shares the one in-memory store. Reads are answered from
+    the report cache, which holds encoded response bodies until the data
+    changes. Posted transactions are queued and written as one batch, so
+    many concurrent writers share a single journal append and fsync. All
+    work runs on the event loop, so a reader never sees half of a batch.
+
+    Routes (amounts in responses are integer cents, in the base currency for
+    totals):
+        GET  /reports/monthly?from=YYYY-MM&to=YYYY-MM
+        GET  /reports/category?type=expense|income&month=YYYY-MM
+        GET  /balance?date=YYYY-MM-DD
+        GET  /transactions?text=&any=1&from=&to=&min=&max=&category=&limit=
+        POST /transactions  (a transaction object or a list of them)
+        GET  /stats
+    """
+
+    def __init__(self, batch_delay=WRITE_BATCH_DELAY, batch_size=WRITE_BATCH_SIZE):
+        """
+        Create a server for the ledger (call scriptfin.load_data() first).
+
+        Args:
+            batch_delay (float): Seconds to wait for more writes before writing a batch
+            batch_size (int): Pending transactions that trigger a write at once
+        """
+        self.batch_delay = batch_delay
+        self.batch_size = batch_size
+        self.latency = LatencyStats()
+        self.pending = []  # (transactions, future) waiting for the next batch
+        self.pending_count = 0
+        self.batch_full = asyncio.Event()
+        self.flush_task = None
+        self.batches = 0  # Batches written
+        self.written = 0  # Transactions written
+        self.routes = {
+            ("GET", "/reports/monthly"): self.monthly,
+            ("GET", "/reports/category"): self.category,
+            ("GET", "/balance"): self.balance,
+            ("GET", "/transactions"): self.search,
+            ("POST", "/transactions"): self.add_transactions,
+            ("GET", "/stats"): self.stats,
+        }
+
+    async def handle_client(self, reader, writer):
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start_time = time.perf_counter()
+                route = "invalid"
+                keep_alive = True
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    headers = await self.read_headers(reader)
+                    keep_alive = (headers.get("connection", "").lower() != "close"
+                                  and version == "HTTP/1.1")
+                    length = int(headers.get("content-length", "0"))
+                    if length > MAX_BODY_SIZE:
+                        keep_alive = False
+                        raise HTTPError(413, f"request body over {MAX_BODY_SIZE} bytes")
+                    body = await reader.readexactly(length) if length else b""
+
+                    url = urllib.parse.urlsplit(target)
+                    route = f"{method} {url.path}"
+                    status, payload = await self.dispatch(method, url.path, url.query, body)
+                except HTTPError as e:
+                    status, payload = e.status, self.encode({"error": str(e)})
+                except (ValueError, UnicodeDecodeError):
+                    status, payload = 400, self.encode({"error": "malformed request"})
+                    keep_alive = False
+
+                writer.write(self.response(status, payload, keep_alive))
+                await writer.drain()
+                self.latency.add(route, time.perf_counter() - start_time)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def read_headers(reader):
+        """Read header lines up to the blank line, returning {lowercase name: value}."""
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    def response(status, payload, keep_alive):
+        """Return the bytes of a JSON response."""
+        head = (f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode("latin-1") + payload
+
+    @staticmethod
+    def encode(data):
+        """Encode a response body."""
+        return (scriptfin.journal_encoder.encode(data) + "\n").encode("utf-8")
+
+    async def dispatch(self, method, path, query, body):
+        """Run the handler for a request, returning (status, encoded body)."""
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                raise HTTPError(405, f"{method} is not supported on {path}")
+            raise HTTPError(404, f"no route {path}")
+
+        params = dict(urllib.parse.parse_qsl(query))
+        if method == "POST":
+            return await handler(body)
+        if handler == self.stats:
+            return 200, self.encode(handler(params))
+
+        # Identical reads share one encoded body until the next change to the data
+        try:
+            return 200, scriptfin.report_cache.get("http", (path, tuple(sorted(params.items()))),
+                                                   lambda: self.encode(handler(params)))
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+    def monthly(self, params):
+        first_month = self.month_param(params, "from")
+        last_month = self.month_param(params, "to")
+        return list(scriptfin.monthly_report(first_month, last_month))
+
+    def category(self, params):
+        trans_type = params.get("type", "expense").lower()
+        if trans_type not in ("expense", "income"):
+            raise ValueError("type must be expense or income")
+        return scriptfin.category_report(trans_type.capitalize(), self.month_param(params, "month"))
+
+    def balance(self, params):
+        date = self.date_param(params, "date") or time.strftime("%Y-%m-%d")
+        return scriptfin.balance_report(date)
+
+    def search(self, params):
+        min_amount = parse_cents(params["min"]) if "min" in params else None
+        max_amount = parse_cents(params["max"]) if "max" in params else None
+        limit = int(params.get("limit", SEARCH_LIMIT))
+        results = scriptfin.search(params.get("text"), params.get("any") != "1",
+                                   self.date_param(params, "from"), self.date_param(params, "to"),
+                                   min_amount, max_amount, params.get("category"))
+        return list(itertools.islice(results, max(limit, 0)))
+
+    def stats(self, params):
+        return {
+            "transactions": len(scriptfin.transactions),
+            "latency": self.latency.summary(),
+            "cache": {"hits": scriptfin.report_cache.hits, "misses": scriptfin.report_cache.misses},
+            "writes": {"batches": self.batches, "transactions": self.written, "pending": self.pending_count},
+        }
+
+    @staticmethod
+    def month_param(params, name):
+        """Return a YYYY-MM query parameter, or None if absent."""
+        if name not in params:
+            return None
+        return time.strftime("%Y-%m", time.strptime(params[name], "%Y-%m"))
+
+    @staticmethod
+    def date_param(params, name):
+        """Return a YYYY-MM-DD query parameter, or None if absent."""
+        if name not in params:
+            return None
+        return time.strftime("%Y-%m-%d", time.strptime(params[name], "%Y-%m-%d"))
+
+    async def add_transactions(self, body):
+        """Validate posted transactions, then wait until their batch is written."""
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        items = data if isinstance(data, list) else [data]
+
+        # Reject the whole request if any transaction is invalid, so none of it is half-added
+        batch = []
+        errors = []
+        currencies = scriptfin.rates.currencies()
+        for position, item in enumerate(items):
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("expected an object")
+                batch.append(build_transaction(
+                    str(item.get("date", "")), str(item.get("description", "")), str(item.get("amount", "")),
+                    str(item.get("type", "")), item.get("category"), scriptfin.categories,
+                    str(item.get("currency", "")), currencies))
+            except ValueError as e:
+                errors.append({"index": position, "error": str(e)})
+        if errors:
+            return 400, self.encode({"errors": errors})
+        if not batch:
+            return 200, self.encode({"added": 0})
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((batch, future))
+        self.pending_count += len(batch)
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self.flush_later())
+        if self.pending_count >= self.batch_size:
+            self.batch_full.set()
+
+        await future
+        return 201, self.encode({"added": len(batch)})
+
+    async def flush_later(self):
+        """Write the pending transactions once the batch is full or has waited long enough."""
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(self.batch_full.wait(), self.batch_delay)
+        self.flush_task = None
+        self.batch_full.clear()
+        self.flush()
+
+    def flush(self):
+        """Add every pending transaction to the store and the journal as one batch."""
+        pending, self.pending, self.pending_count = self.pending, [], 0
+        if not pending:
+            return
+        batch = [transaction for transactions, _ in pending for transaction in transactions]
+        try:
+            scriptfin.transactions.extend(batch)
+            scriptfin.ledger_stats.extend(batch)
+            scriptfin.record_changes("transaction", batch)
+            if scriptfin.STORAGE_BACKEND == "json" and scriptfin.journal_records >= scriptfin.COMPACT_THRESHOLD:
+                scriptfin.compact_data()
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(HTTPError(500, f"error saving transactions: {e}"))
+            return
+        self.batches += 1
+        self.written += len(batch)
+        for _, future in pending:
+            future.set_result(None)
+
+    async def refresh_loop(self):
+        """Pick up changes other sessions make to the ledger."""
+        while True:
+            await asyncio.sleep(REFRESH_INTERVAL)
+            with contextlib.redirect_stdout(sys.stderr):
+                scriptfin.refresh_data()
+
+
+async def serve(host, port, batch_delay, batch_size):
+    with contextlib.redirect_stdout(sys.stderr):
+        scriptfin.load_data()
+    finance_server = FinanceServer(batch_delay, batch_size)
+    server = await asyncio.start_server(finance_server.handle_client, host, port)
+    refresh_task = asyncio.create_task(finance_server.refresh_loop())
+
+    # Stop cleanly on Ctrl+C or SIGTERM, so pending writes are flushed and the ledger saved
+    stop = asyncio.Event()
+    for name in ("SIGINT", "SIGTERM"):
+        with contextlib.suppress(AttributeError, NotImplementedError):  # Not on Windows
+            asyncio.get_running_loop().add_signal_handler(getattr(signal, name), stop.set)
+
+    print(f"Serving {len(scriptfin.transactions)} transactions on http://{host}:{port}", file=sys.stderr)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        refresh_task.cancel()
+        finance_server.flush()
+        with contextlib.redirect_stdout(sys.stderr):
+            scriptfin.save_data()
+
+
+# ----- Load test -----
+
+async def send_request(reader, writer, method, target, body=b""):
+    """Send one request on a keep-alive connection and return (status, body)."""
+    writer.write((f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+                  f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = await FinanceServer.read_headers(reader)
+    return status, await reader.readexactly(int(headers.get("content-length", "0")))
+
+
+def load_test_requests(count, write_ratio, seed):
+    """Return a mixed list of (kind, method, target, body) requests."""
+    rng = random.Random(seed)
+    writes = generate_transactions(count, scriptfin.categories, seed)
+    months = sorted({transaction["date"][:7] for transaction in writes})
+    requests = []
+    for transaction in writes:
+        if rng.random() < write_ratio:
+            body = dict(transaction, amount=scriptfin.format_decimal(transaction["amount"]))
+            requests.append(("add", "POST", "/transactions", json.dumps(body).encode("utf-8")))
+            continue
+        month = rng.choice(months)
+        requests.append(rng.choice([
+            ("monthly", "GET", "/reports/monthly", b""),
+            ("category", "GET", f"/reports/category?month={month}", b""),
+            ("balance", "GET", f"/balance?date={month}-28", b""),
+            ("search", "GET", f"/transactions?text={transaction['description'].split()[0]}&limit=50", b""),
+            ("search", "GET", f"/transactions?from={month}-01&to={month}-07&limit=50", b""),
+        ]))
+    return requests
+
+
+async def load_test(host, port, clients, count, write_ratio, seed):
+    """Send requests from several concurrent connections and report throughput and latency."""
+    requests = iter(load_test_requests(count, write_ratio, seed))
+    latencies = {}  # kind -> seconds per request
+    failures = []
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for kind, method, target, body in requests:
+                start_time = time.perf_counter()
+                status, response = await send_request(reader, writer, method, target, body)
+                latencies.setdefault(kind, []).append(time.perf_counter() - start_time)
+                if status >= 400:
+                    failures.append((status, response))
+        finally:
+            writer.close()
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    elapsed = time.perf_counter() - start_time
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{total} requests from {clients} clients in {elapsed:.2f}s ({total / elapsed:,.0f} requests/s), "
+          f"{len(failures)} failed")
+    print(f"{'Request':<12} {'Count':>8} {'p50 ms':>10} {'p90 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for kind, values in sorted(latencies.items()):
+        cuts = statistics.quantiles(values, n=100) if len(values) > 1 else values * 99
+        print(f"{kind:<12} {len(values):>8} {cuts[49] * 1000:>10.3f} {cuts[89] * 1000:>10.3f} "
+              f"{cuts[98] * 1000:>10.3f} {max(values) * 1000:>10.3f}")
+    for status, response in failures[:5]:
+        print(f"Failed ({status}): {response.decode('utf-8', 'replace').strip()}")
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, response = await send_request(reader, writer, "GET", "/stats")
+    writer.close()
+    print(f"Server: {response.decode('utf-8').strip()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the finance tracker over HTTP/JSON, or load-test a server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_command = commands.add_parser("serve", help="serve the ledger in the current directory")
+    serve_command.add_argument("--host", default=DEFAULT_HOST)
+    serve_command.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_command.add_argument("--batch-delay", type=float, default=WRITE_BATCH_DELAY,
+                               help="seconds a write waits to share its batch")
+    serve_command.add_argument("--batch-size", type=int, default=WRITE_BATCH_SIZE,
+                               help="pending transactions that trigger a write at once")
+
+    load_command = commands.add_parser("load-test", help="send a mix of reads and writes to a running server")
+    load_command.add_argument("--host", default=DEFAULT_HOST)
+    load_command.add_argument("--port", type=int, default=DEFAULT_PORT)
+    load_command.add_argument("--clients", type=int, default=20, help="concurrent connections")
+    load_command.add_argument("--requests", type=int, default=5000, help="requests in total")
+    load_command.add_argument("--write-ratio", type=float, default=0.1, help="share of requests that add a transaction")
+    load_command.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "serve":
+            asyncio.run(serve(args.host, args.port, args.batch_delay, args.batch_size))
+        else:
+            asyncio.run(load_test(args.host, args.port, args.clients, args.requests, args.write_ratio, args.seed))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()